@@ -1,43 +1,216 @@
-import pandas as pd
+"""
+Анализ журнала выстрелов: какие входы реально влияют на поправку.
+Без окон — результаты пишутся в файлы:
+  importance.csv      — важность по примесям (MDI) и перестановочная важность
+  distance_bins.csv   — ошибка леса и перестановочная важность по диапазонам дистанции
+  summary.json        — объем данных, время, R^2
+  importance.png      — график (с --plot)
+
+Журналы: *.shots (memmap) или CSV, можно несколько (шарды фермы).
+Большие журналы прореживаются равномерной случайной выборкой (--sample),
+журналы читаются кусками. Лес и перестановки считаются на всех ядрах (--n-jobs).
+
+    python analise.py data/dataset_01.shots data/farm_*.shots --sample 500000
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
 import numpy as np
-import matplotlib.pyplot as plt
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
+from sklearn.inspection import permutation_importance
 
-# 1. Загрузка данных
-try:
-    fn = "data/dataset_01.csv"
-    df = pd.read_csv(fn)
-except FileNotFoundError:
-    print(f"Файл {fn} не найден!")
-    exit()
+from tur_sim.shot_log import iter_row_chunks
 
 # Определяем входы и выходы
 features = ["err_yaw", "err_pitch", "v_yaw", "v_pitch", "dist", "turret_pitch"]
 targets = ["delta_yaw", "delta_pitch"]
 
-X = df[features]
-y = df[targets]
-
-# 2. Обучение модели для анализа
-# Используем 100 деревьев, чтобы получить стабильный результат
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X, y)
-
-# 3. Извлекаем важность
-importances = model.feature_importances_
-indices = np.argsort(importances)[::-1]
-
-# 4. Визуализация
-plt.figure(figsize=(10, 6))
-plt.title("Важность признаков для баллистической коррекции")
-plt.bar(range(X.shape[1]), importances[indices], align="center")
-plt.xticks(range(X.shape[1]), [features[i] for i in indices], rotation=45)
-plt.ylabel("Доля влияния (0.0 - 1.0)")
-plt.tight_layout()
-plt.show()
-
-# Вывод в консоль
-print("Рейтинг полезности полей:")
-for i in indices:
-    print(f"{features[i]}: {importances[i]:.4f}")
\ No newline at end of file
+
+def sample_rows(paths, columns, n, seed=0, chunk_size=200_000):
+    """
+    Равномерная выборка до n строк (без NaN) из нескольких журналов, не загружая их целиком.
+    Резервуар (алгоритм R) по кускам всех журналов подряд: строка попадает в выборку
+    с вероятностью n / seen, где seen — все строки, увиденные к этому моменту.
+    n=None — все строки без выборки.
+    """
+    if n is None:
+        blocks = [block for path in paths for _, block in iter_row_chunks(path, columns, chunk_size)]
+        return np.concatenate(blocks) if blocks else np.empty((0, len(columns)))
+
+    rng = np.random.default_rng(seed)
+    reservoir = np.empty((n, len(columns)))
+    seen = 0
+    for path in paths:
+        for _, block in iter_row_chunks(path, columns, chunk_size):
+            # Пока резервуар не полон — берем подряд
+            fill = min(max(n - seen, 0), len(block))
+            reservoir[seen:seen + fill] = block[:fill]
+            rest = block[fill:]
+            if len(rest):
+                # Номер строки в потоке (с 1) -> случайный слот 0..номер-1, слот < n — замена
+                num = seen + fill + np.arange(1, len(rest) + 1)
+                slot = (rng.random(len(rest)) * num).astype(np.int64)
+                take = slot < n
+                slot, rest = slot[take], rest[take]
+                # Один слот несколько раз — остается более поздняя строка, как в пошаговом алгоритме
+                last = len(slot) - 1 - np.unique(slot[::-1], return_index=True)[1]
+                reservoir[slot[last]] = rest[last]
+            seen += len(block)
+    return reservoir[:min(seen, n)]
+
+
+def distance_breakdown(model, X, y, bins, n_repeats, seed):
+    """
+    По диапазонам дистанции: MAE/RMSE леса по каждой поправке и рост MSE
+    при перестановке каждого входа внутри диапазона
+    """
+    rng = np.random.default_rng(seed)
+    dist = X[:, features.index("dist")]
+    rows = []
+    for lo, hi in zip(bins[:-1], bins[1:]):
+        m = (dist >= lo) & (dist < hi)
+        if m.sum() < 10:
+            continue
+        Xb, yb = X[m], y[m]
+        abs_err = np.abs(model.predict(Xb) - yb)
+        base_mse = (abs_err ** 2).mean()
+        row = {"dist_from": lo, "dist_to": hi, "count": int(m.sum())}
+        for j, t in enumerate(targets):
+            row[f"mae_{t}"] = float(abs_err[:, j].mean())
+            row[f"rmse_{t}"] = float(np.sqrt((abs_err[:, j] ** 2).mean()))
+
+        # Все перестановки одной пачкой — один вызов predict на диапазон
+        stacked = np.repeat(Xb[None], len(features) * n_repeats, axis=0)
+        for f in range(len(features)):
+            for r in range(n_repeats):
+                stacked[f * n_repeats + r, :, f] = rng.permutation(Xb[:, f])
+        pred = model.predict(stacked.reshape(-1, Xb.shape[1])).reshape(len(features), n_repeats, len(Xb), -1)
+        mse = ((pred - yb) ** 2).mean(axis=(2, 3))  # [feature, repeat]
+        for f, name in enumerate(features):
+            row[f"perm_{name}"] = float(mse[f].mean() - base_mse)
+        rows.append(row)
+    return rows
+
+
+def write_csv(path, rows):
+    if not rows:
+        return
+    keys = list(rows[0].keys())
+    with open(path, "w") as f:
+        f.write(",".join(keys) + "\n")
+        for row in rows:
+            f.write(",".join(f"{row[k]:.6g}" if isinstance(row[k], float) else str(row[k]) for k in keys) + "\n")
+
+
+def save_plot(importance, path):
+    """График в файл (бэкенд Agg — окно не нужно)"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib не установлен — график пропущен")
+        return
+
+    names = [r["feature"] for r in importance]
+    x = np.arange(len(names))
+    plt.figure(figsize=(10, 6))
+    plt.title("Важность признаков для баллистической коррекции")
+    plt.bar(x - 0.2, [r["impurity"] for r in importance], 0.4, label="по примесям (MDI)")
+    plt.bar(x + 0.2, [r["permutation_mean"] for r in importance], 0.4,
+            yerr=[r["permutation_std"] for r in importance], label="перестановочная")
+    plt.xticks(x, names, rotation=45)
+    plt.ylabel("Доля влияния / падение R^2")
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(path, dpi=100)
+    plt.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Важность признаков баллистической коррекции")
+    parser.add_argument("data", nargs="*", default=["data/dataset_01.csv"],
+                        help="журналы *.shots / *.csv (можно маски)")
+    parser.add_argument("--sample", type=int, default=100_000, help="строк в анализе (0 — все)")
+    parser.add_argument("--test-frac", type=float, default=0.2, help="доля для перестановочной важности")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--min-leaf", type=int, default=20, help="min_samples_leaf леса")
+    parser.add_argument("--max-samples", type=float, default=0.5, help="доля бутстрепа на дерево")
+    parser.add_argument("--repeats", type=int, default=5, help="повторов перестановки")
+    parser.add_argument("--bins", default="0,10,20,30,40,60,1000", help="границы дистанции, м")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="ядер (-1 — все)")
+    parser.add_argument("--out", default="data/analysis", help="каталог для результатов")
+    parser.add_argument("--plot", action="store_true", help="сохранить importance.png")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    paths = sorted({p for pattern in args.data for p in (glob.glob(pattern) or [pattern])})
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        raise SystemExit(f"Файл не найден: {', '.join(missing)}")
+    os.makedirs(args.out, exist_ok=True)
+
+    # 1. Загрузка данных (выборка, без полного чтения)
+    t0 = time.perf_counter()
+    n = args.sample if args.sample > 0 else None
+    rows = sample_rows(paths, features + targets, n, args.seed)
+    X, y = rows[:, :len(features)], rows[:, len(features):]
+    t_load = time.perf_counter() - t0
+    print(f"Строк: {len(X)} из {len(paths)} журналов, {t_load:.1f} с")
+
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(X))
+    split = int(len(X) * (1 - args.test_frac))
+    tr, te = order[:split], order[split:]
+
+    # 2. Обучение модели для анализа
+    t0 = time.perf_counter()
+    model = RandomForestRegressor(n_estimators=args.trees, min_samples_leaf=args.min_leaf,
+                                  max_samples=args.max_samples, n_jobs=args.n_jobs,
+                                  random_state=args.seed)
+    model.fit(X[tr], y[tr])
+    t_fit = time.perf_counter() - t0
+    r2 = model.score(X[te], y[te])
+    print(f"Лес: {t_fit:.1f} с, R^2 на отложенных: {r2:.3f}")
+
+    # 3. Важность: по примесям и перестановочная (на отложенных строках)
+    t0 = time.perf_counter()
+    perm = permutation_importance(model, X[te], y[te], n_repeats=args.repeats,
+                                  n_jobs=args.n_jobs, random_state=args.seed)
+    importance = [{
+        "feature": name,
+        "impurity": float(model.feature_importances_[i]),
+        "permutation_mean": float(perm.importances_mean[i]),
+        "permutation_std": float(perm.importances_std[i]),
+    } for i, name in enumerate(features)]
+    importance.sort(key=lambda r: r["permutation_mean"], reverse=True)
+
+    # 4. Разбивка по дистанции
+    bins = [float(b) for b in args.bins.split(",")]
+    by_dist = distance_breakdown(model, X[te], y[te], bins, args.repeats, args.seed)
+    t_imp = time.perf_counter() - t0
+
+    write_csv(os.path.join(args.out, "importance.csv"), importance)
+    write_csv(os.path.join(args.out, "distance_bins.csv"), by_dist)
+    with open(os.path.join(args.out, "summary.json"), "w") as f:
+        json.dump({
+            "logs": paths, "rows": int(len(X)), "test_rows": int(len(te)),
+            "r2_test": float(r2), "trees": args.trees,
+            "time_load": t_load, "time_fit": t_fit, "time_importance": t_imp,
+        }, f, indent=2)
+
+    if args.plot:
+        save_plot(importance, os.path.join(args.out, "importance.png"))
+
+    # Вывод в консоль
+    print("Рейтинг полезности полей (перестановочная / по примесям):")
+    for r in importance:
+        print(f"{r['feature']}: {r['permutation_mean']:.4f} ± {r['permutation_std']:.4f} / {r['impurity']:.4f}")
+    print(f"Результаты: {args.out} (важность {t_imp:.1f} с)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Бенчмарк точности: детерминированные headless прогоны автоматической стрельбы
+по набору движений цели (неподвижная, MotionCircular, MotionPointToPoint,
+MotionSpline) на нескольких скоростях. Для каждого сценария:
+  выстрелы, попадания, попадания из серии коррекций, доля попаданий,
+  время до первого попадания, средний промах (минимальное сближение пули с целью).
+
+У каждого сценария свои допуски:
+  - нижняя граница доли попаданий и верхняя граница среднего промаха (таблица SCENARIOS);
+  - с --baseline — насколько можно ухудшиться относительно сохраненного прогона (BANDS).
+Выход за допуск — код выхода 1: ускорение трекера, решателя или корректора
+не должно стоить точности.
+
+    python bench_accuracy.py
+    python bench_accuracy.py --update-baseline
+    python bench_accuracy.py --baseline data/bench/accuracy_baseline.json --workers 4
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tur_sim.controller import Controller
+from tur_sim.headless_runner import HeadlessRunner
+from tur_sim.motion_base import MotionCircular, MotionPointToPoint, MotionSpline
+from tur_sim.physical_object import PhysicalObject
+
+BASELINE_PATH = "data/bench/accuracy_baseline.json"
+
+# Сценарий: движение цели и скорость (рад/с для круга, м/с для остальных),
+# min_hit_rate / max_miss — допуск сценария (доля попаданий, средний промах в м).
+# Средний промах тянут редкие дальние промахи (цель MotionPointToPoint прыгает
+# на старт, разворот сплайна), поэтому для круга он меньше, чем для остальных
+SCENARIOS = {
+    "static":        {"motion": "static",   "speed": 0.0, "min_hit_rate": 0.85, "max_miss": 0.75},
+    "circular_slow": {"motion": "circular", "speed": 0.3, "min_hit_rate": 0.85, "max_miss": 0.4},
+    "circular_mid":  {"motion": "circular", "speed": 0.6, "min_hit_rate": 0.80, "max_miss": 0.5},
+    "circular_fast": {"motion": "circular", "speed": 1.0, "min_hit_rate": 0.75, "max_miss": 0.6},
+    "p2p_slow":      {"motion": "p2p",      "speed": 1.0, "min_hit_rate": 0.85, "max_miss": 1.1},
+    "p2p_mid":       {"motion": "p2p",      "speed": 2.0, "min_hit_rate": 0.80, "max_miss": 1.2},
+    "p2p_fast":      {"motion": "p2p",      "speed": 4.0, "min_hit_rate": 0.55, "max_miss": 1.6},
+    "spline_slow":   {"motion": "spline",   "speed": 2.0, "min_hit_rate": 0.75, "max_miss": 0.85},
+    "spline_mid":    {"motion": "spline",   "speed": 4.0, "min_hit_rate": 0.55, "max_miss": 1.9},
+    "spline_fast":   {"motion": "spline",   "speed": 6.0, "min_hit_rate": 0.35, "max_miss": 3.2},
+}
+
+# Допуски относительно базового прогона
+BANDS = {
+    "hit_rate": 0.05,  # доля попаданий может упасть не больше чем на 5 п.п.
+    "mean_miss": 0.15,  # средний промах может вырасти не больше чем на 15 %
+    "time_to_first_hit": 0.5,  # сек
+}
+
+
+def make_behavior(spec):
+    """(начальная позиция, поведение) цели для сценария"""
+    motion, speed = spec["motion"], spec["speed"]
+    if motion == "static":
+        return [2, -3, 15], None
+    if motion == "circular":
+        # Старт на окружности (угол 0)
+        return [4, -3, 15], MotionCircular(center=[0, -3, 15], radius=4, speed=speed)
+    if motion == "p2p":
+        start, end = [-6, -3, 20], [6, -3, 10]
+        return start, MotionPointToPoint(start, end, speed)
+    if motion == "spline":
+        # Те же границы, что в Controller._init_world; точки из засеянного np.random
+        spline = MotionSpline([-8, -8, 5], [8, -1, 30], num_points=50, speed=speed)
+        return spline.waypoints[0].copy(), spline
+    raise ValueError(f"неизвестное движение: {motion}")
+
+
+def controller_class(spec, series):
+    class AccuracyController(Controller):
+        LOGGING_SHOTS = False
+        USE_SERIES = series
+
+        def _init_world(self):
+            pos, behavior = make_behavior(spec)
+            self.target_obj = PhysicalObject(
+                pos=pos, radius=self.TARGET_RADIUS,
+                color=(0, 255, 255), behavior=behavior,
+                obj_type="target"
+            )
+            self.world.add_object(self.target_obj)
+
+    return AccuracyController
+
+
+class ShotProbe:
+    """После каждого кадра: промах завершенных выстрелов и время первого попадания"""
+
+    def __init__(self):
+        self.misses = []
+        self.first_hit = None
+        self._shot = None
+
+    def __call__(self, controller):
+        shot = controller.active_shot
+        if self._shot is not None and shot is not self._shot:
+            # Выстрел разобран (_finalize_shot) — берем минимальное сближение
+            if math.isfinite(self._shot["min_dist"]):
+                self.misses.append(self._shot["min_dist"])
+        self._shot = shot
+
+        if self.first_hit is None and controller.hits_count > 0:
+            self.first_hit = controller.clock.now()
+
+
+def run_one(job):
+    name, seed, duration, series = job
+    runner = HeadlessRunner(seed, controller_factory=controller_class(SCENARIOS[name], series))
+    probe = ShotProbe()
+    controller = runner.run(duration, probe)
+    runner.close()
+    return {
+        "scenario": name,
+        "seed": seed,
+        "shots": controller.shots_count,
+        "hits": controller.hits_count,
+        "series_hits": controller.chits_count,
+        "misses": probe.misses,
+        "first_hit": probe.first_hit,
+    }
+
+
+def aggregate(runs):
+    """Сводка сценария по всем seed-ам"""
+    shots = sum(r["shots"] for r in runs)
+    hits = sum(r["hits"] for r in runs)
+    misses = [m for r in runs for m in r["misses"]]
+    first = [r["first_hit"] for r in runs if r["first_hit"] is not None]
+    return {
+        "seeds": [r["seed"] for r in runs],
+        "shots": shots,
+        "hits": hits,
+        "series_hits": sum(r["series_hits"] for r in runs),
+        "hit_rate": hits / shots if shots else 0.0,
+        "mean_miss": float(np.mean(misses)) if misses else None,
+        "median_miss": float(np.median(misses)) if misses else None,
+        # Если в каком-то прогоне попаданий нет, время до первого попадания — None
+        "time_to_first_hit": float(np.mean(first)) if len(first) == len(runs) else None,
+    }
+
+
+def check(name, res, baseline):
+    """Нарушения допусков сценария"""
+    spec = SCENARIOS[name]
+    problems = []
+    if res["hit_rate"] < spec["min_hit_rate"]:
+        problems.append(f"доля попаданий {res['hit_rate']:.1%} < {spec['min_hit_rate']:.0%}")
+    if res["mean_miss"] is None or res["mean_miss"] > spec["max_miss"]:
+        problems.append(f"средний промах {res['mean_miss']} > {spec['max_miss']} м")
+
+    ref = (baseline or {}).get("scenarios", {}).get(name)
+    if ref is None:
+        return problems
+
+    if res["hit_rate"] < ref["hit_rate"] - BANDS["hit_rate"]:
+        problems.append(f"доля попаданий {res['hit_rate']:.1%} < база {ref['hit_rate']:.1%} "
+                        f"- {BANDS['hit_rate']:.0%}")
+    if ref["mean_miss"] is not None and res["mean_miss"] is not None \
+            and res["mean_miss"] > ref["mean_miss"] * (1 + BANDS["mean_miss"]):
+        problems.append(f"средний промах {res['mean_miss']:.3f} > база {ref['mean_miss']:.3f} м "
+                        f"+ {BANDS['mean_miss']:.0%}")
+    if ref["time_to_first_hit"] is not None:
+        if res["time_to_first_hit"] is None:
+            problems.append("нет попадания хотя бы в одном прогоне (в базе было)")
+        elif res["time_to_first_hit"] > ref["time_to_first_hit"] + BANDS["time_to_first_hit"]:
+            problems.append(f"до первого попадания {res['time_to_first_hit']:.2f} > база "
+                            f"{ref['time_to_first_hit']:.2f} + {BANDS['time_to_first_hit']} с")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк точности на детерминированных сценариях")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="через запятую")
+    parser.add_argument("--seeds", default="0,1", help="seed-ы через запятую")
+    parser.add_argument("--duration", type=float, default=60.0, help="модельных секунд на прогон")
+    parser.add_argument("--series", action="store_true", help="включить серию коррекций (USE_SERIES)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--out", help="JSON с результатами (по умолчанию data/bench/accuracy_<время>.json)")
+    parser.add_argument("--baseline", help=f"сравнить с базовым прогоном (например {BASELINE_PATH})")
+    parser.add_argument("--update-baseline", action="store_true", help=f"сохранить прогон как {BASELINE_PATH}")
+    args = parser.parse_args()
+
+    names = [n for n in args.scenarios.split(",") if n]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Неизвестные сценарии: {', '.join(unknown)}")
+    seeds = [int(s) for s in args.seeds.split(",") if s]
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    jobs = [(name, seed, args.duration, args.series) for name in names for seed in seeds]
+    start = time.time()
+    if args.workers > 1:
+        with ProcessPoolExecutor(args.workers) as pool:
+            runs = list(pool.map(run_one, jobs))
+    else:
+        runs = [run_one(job) for job in jobs]
+
+    results = {}
+    failed = False
+    print(f"{'сценарий':<15} {'выстр.':>6} {'попад.':>6} {'серия':>5} {'доля':>7} "
+          f"{'промах ср/мед, м':>16} {'1-е попад., с':>13}")
+    for name in names:
+        res = aggregate([r for r in runs if r["scenario"] == name])
+        results[name] = res
+        nan = float("nan")
+        ttfh = res["time_to_first_hit"]
+        miss = res["mean_miss"]
+        median = res["median_miss"]
+        print(f"{name:<15} {res['shots']:>6} {res['hits']:>6} {res['series_hits']:>5} "
+              f"{res['hit_rate']:>7.1%} {miss if miss is not None else nan:>8.3f}/"
+              f"{median if median is not None else nan:<7.3f} "
+              f"{ttfh if ttfh is not None else nan:>13.2f}")
+        for p in check(name, res, baseline):
+            print(f"  ДОПУСК: {p}")
+            failed = True
+    print(f"Время: {time.time() - start:.0f} с")
+
+    report = {
+        "meta": {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "seeds": seeds,
+                 "duration": args.duration, "series": args.series},
+        "scenarios": results,
+    }
+    out = args.out or f"data/bench/accuracy_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Результаты: {out}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Базовый прогон обновлен: {BASELINE_PATH}")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
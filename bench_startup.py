@@ -0,0 +1,72 @@
+"""
+Время запуска: сколько стоит импорт точек входа tur_sim.
+Каждый модуль импортируется в чистом процессе с `python -X importtime`,
+печатаются самые дорогие зависимости. Код выхода 1, если превышен бюджет
+или подтянулась тяжелая библиотека, которая этому режиму не нужна.
+
+    python bench_startup.py
+    python bench_startup.py --repeat 5 --top 15
+"""
+import argparse
+import subprocess
+import sys
+
+# модуль -> (бюджет в секундах, библиотеки, которых тут быть не должно)
+TARGETS = {
+    "tur_sim.controller": (0.6, ("torch", "sklearn", "joblib", "pandas", "pygame", "matplotlib")),
+    "tur_sim.headless_runner": (0.6, ("torch", "sklearn", "joblib", "pandas", "pygame", "matplotlib")),
+    "tur_sim.ui_manager": (1.0, ("torch", "sklearn", "joblib", "pandas", "matplotlib")),
+}
+
+
+def measure(module):
+    """Один импорт в новом процессе: {модуль: (своё, суммарное)} в секундах"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"не удалось импортировать {module}:\n{proc.stderr[-2000:]}")
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumul_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us) / 1e6, int(cumul_us) / 1e6)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бюджет времени импорта tur_sim")
+    parser.add_argument("--repeat", type=int, default=3, help="берется лучший из N запусков")
+    parser.add_argument("--top", type=int, default=10, help="сколько самых дорогих модулей показать")
+    parser.add_argument("--scale", type=float, default=1.0, help="множитель бюджета (медленная машина)")
+    args = parser.parse_args()
+
+    failed = False
+    for module, (budget, forbidden) in TARGETS.items():
+        runs = [measure(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda t: t[module][1])
+        total = best[module][1]
+        budget *= args.scale
+
+        print(f"\n{module}: {total * 1000:.0f} мс (бюджет {budget * 1000:.0f} мс)")
+        top = sorted(best.items(), key=lambda kv: kv[1][0], reverse=True)[:args.top]
+        for name, (self_t, cumul_t) in top:
+            print(f"  {self_t * 1000:8.1f} мс своё {cumul_t * 1000:8.1f} мс всего  {name}")
+
+        loaded = sorted(lib for lib in forbidden if lib in best)
+        if loaded:
+            print(f"  ОШИБКА: лишние тяжелые зависимости: {', '.join(loaded)}")
+            failed = True
+        if total > budget:
+            print("  ОШИБКА: бюджет превышен")
+            failed = True
+
+    print("\nFAIL" if failed else "\nOK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Бенчмарк производительности: headless прогоны Controller по матрице сценариев
+  число целей (1, 10, 100, 1000) x залповый огонь (нет / да) x разрешение камеры.
+Фиксированные seed-ы; для каждого сценария — кадров в секунду и время стадий
+по StageProfiler (world, camera, analyzer, track, fire_solution, ...),
+лучший из --repeat прогонов.
+
+Результаты сохраняются в JSON, чтобы сравнивать прогоны. С --baseline
+сценарии сверяются с сохраненным прогоном: FPS ниже базового больше чем на
+--tolerance — код выхода 1. Замедлившиеся стадии печатаются как предупреждения
+(с --strict-stages — тоже ошибка): на общей машине они плавают все разом.
+
+    python benchmark.py --quick
+    python benchmark.py --out data/bench/after.json --baseline data/bench/baseline.json
+    python benchmark.py --targets 1,100 --resolutions 640x480 --update-baseline
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import time
+
+import numpy as np
+
+from tur_sim.controller import Controller
+from tur_sim.headless_runner import HeadlessRunner
+from tur_sim.motion_base import MotionCircular
+from tur_sim.physical_object import PhysicalObject
+
+BASELINE_PATH = "data/bench/baseline.json"
+
+TARGETS = (1, 10, 100, 1000)
+SALVO = (False, True)
+RESOLUTIONS = ((320, 240), (640, 480), (1280, 720))
+
+# Залп: SALVO_SIZE пуль каждые SALVO_EVERY кадров (в воздухе ~150 пуль при 60 Гц)
+SALVO_SIZE = 5
+SALVO_EVERY = 6
+
+# Стадии быстрее этого не сравниваем с базой — там один шум таймера
+MIN_STAGE_MS = 0.05
+
+
+def calibrate(repeat=7):
+    """
+    Скорость машины: лучшее время фиксированной нагрузки (Python-цикл + мелкий NumPy,
+    как в кадре). При сравнении с базой FPS масштабируется на отношение калибровок
+    """
+    rng = np.random.default_rng(0)
+    a = rng.random((64, 3))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        acc = 0.0
+        for i in range(20000):
+            v = a[i % 64]
+            acc += float(np.linalg.norm(v - a[(i * 7) % 64])) + i * 0.5
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def controller_class(n_targets, width, height):
+    """Controller с заданным разрешением камеры и n_targets целями (первая — обычная)"""
+
+    class BenchController(Controller):
+        CAMERA_WIDTH = width
+        CAMERA_HEIGHT = height
+        # Тот же угол обзора, что у 640x480 с f=500
+        CAMERA_F = Controller.CAMERA_F * width / Controller.CAMERA_WIDTH
+        PROFILING = True
+        LOGGING_SHOTS = False
+
+        def _init_world(self):
+            super()._init_world()
+            # Дополнительные цели — по кругам в поле зрения (np.random уже засеян раннером)
+            for _ in range(n_targets - 1):
+                center = np.random.uniform([-8, -8, 8], [8, -1, 30])
+                behavior = MotionCircular(center=center, radius=np.random.uniform(0.5, 4),
+                                          speed=np.random.uniform(0.3, 2.0))
+                self.world.add_object(PhysicalObject(
+                    pos=center, radius=self.TARGET_RADIUS,
+                    color=(0, 255, 255), behavior=behavior,
+                    obj_type="target"
+                ))
+
+    return BenchController
+
+
+def run_scenario(n_targets, salvo, resolution, frames, warmup, seed, physics_hz):
+    width, height = resolution
+    runner = HeadlessRunner(seed, controller_factory=controller_class(n_targets, width, height),
+                            physics_hz=physics_hz)
+    controller = runner.controller
+
+    frame_no = [0]
+
+    def on_step(c):
+        frame_no[0] += 1
+        if salvo and frame_no[0] % SALVO_EVERY == 0:
+            for _ in range(SALVO_SIZE):
+                c.turret.fire()
+
+    # Прогрев: кеши, первые захваты, пули в воздухе
+    runner.run(warmup * runner.dt, on_step)
+    controller.profiler.reset()
+
+    start = time.perf_counter()
+    runner.run(frames * runner.dt, on_step)
+    wall = time.perf_counter() - start
+    runner.close()
+
+    bullets = sum(1 for o in controller.world.objects if o.obj_type == "bullet")
+    return {
+        "targets": n_targets,
+        "salvo": salvo,
+        "resolution": f"{width}x{height}",
+        "frames": frames,
+        "wall_sec": wall,
+        "fps": frames / wall,
+        "realtime_factor": frames * runner.dt / wall,
+        "bullets_in_air": bullets,
+        "shots": controller.shots_count,
+        "stages": {r["stage"]: {k: r[k] for k in ("count", "mean_ms", "p50_ms", "p95_ms", "p99_ms")}
+                   for r in controller.profiler.summary()},
+    }
+
+
+def scenario_name(n_targets, salvo, resolution):
+    return f"t{n_targets}_{'salvo' if salvo else 'single'}_{resolution[0]}x{resolution[1]}"
+
+
+def compare(results, baseline, tolerance, speed=1.0):
+    """
+    Ухудшения относительно базового прогона: (по FPS, по стадиям).
+    speed — во сколько раз машина сейчас быстрее, чем при базовом прогоне
+    """
+    fps_problems, stage_problems = [], []
+    for name, cur in results.items():
+        ref = baseline.get("scenarios", {}).get(name)
+        if ref is None:
+            continue
+        ref_fps = ref["fps"] * speed
+        if cur["fps"] < ref_fps * (1 - tolerance):
+            fps_problems.append(f"{name}: FPS {cur['fps']:.1f} < {ref_fps:.1f}")
+        for stage, st in cur["stages"].items():
+            ref_st = ref["stages"].get(stage)
+            if ref_st is None or ref_st["p50_ms"] < MIN_STAGE_MS:
+                continue
+            if st["p50_ms"] > ref_st["p50_ms"] / speed * (1 + tolerance):
+                stage_problems.append(f"{name}: {stage} p50 {st['p50_ms']:.3f} мс > {ref_st['p50_ms']:.3f} мс")
+    return fps_problems, stage_problems
+
+
+def parse_list(text, cast):
+    return [cast(v) for v in text.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк производительности Controller")
+    parser.add_argument("--targets", default=",".join(map(str, TARGETS)), help="число целей через запятую")
+    parser.add_argument("--salvo", default="0,1", help="залповый огонь: 0, 1 или 0,1")
+    parser.add_argument("--resolutions", default=",".join(f"{w}x{h}" for w, h in RESOLUTIONS))
+    parser.add_argument("--frames", type=int, default=300, help="кадров на сценарий (замер)")
+    parser.add_argument("--warmup", type=int, default=60, help="кадров прогрева (не в замере)")
+    parser.add_argument("--repeat", type=int, default=3, help="прогонов сценария, берется самый быстрый")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--physics-hz", type=int, default=None,
+                        help="физика подшагами (как в UI); по умолчанию шаг = кадр")
+    parser.add_argument("--quick", action="store_true", help="малая матрица: 1 и 100 целей, 640x480")
+    parser.add_argument("--out", help="JSON с результатами (по умолчанию data/bench/bench_<время>.json)")
+    parser.add_argument("--baseline", help=f"сравнить с базовым прогоном (например {BASELINE_PATH})")
+    parser.add_argument("--update-baseline", action="store_true", help=f"сохранить прогон как {BASELINE_PATH}")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="допустимое ухудшение (доля)")
+    parser.add_argument("--no-calibration", action="store_true", help="сравнивать без поправки на скорость машины")
+    parser.add_argument("--strict-stages", action="store_true", help="замедление стадии — тоже регрессия")
+    args = parser.parse_args()
+
+    targets = parse_list(args.targets, int)
+    salvos = [bool(int(v)) for v in parse_list(args.salvo, str)]
+    resolutions = [tuple(int(x) for x in r.split("x")) for r in parse_list(args.resolutions, str)]
+    if args.quick:
+        targets, resolutions = [1, 100], [(640, 480)]
+
+    calibration = calibrate()  # и до, и после матрицы — берем лучшее
+    results = {}
+    for n_targets, salvo, resolution in itertools.product(targets, salvos, resolutions):
+        name = scenario_name(n_targets, salvo, resolution)
+        # Лучший из нескольких прогонов: шум машины только замедляет
+        runs = [run_scenario(n_targets, salvo, resolution, args.frames, args.warmup,
+                             args.seed, args.physics_hz) for _ in range(max(args.repeat, 1))]
+        res = max(runs, key=lambda r: r["fps"])
+        res["fps_runs"] = [r["fps"] for r in runs]
+        results[name] = res
+
+        top = sorted(res["stages"].items(), key=lambda kv: kv[1]["mean_ms"], reverse=True)
+        top = ", ".join(f"{s} {st['p50_ms']:.2f}/{st['p95_ms']:.2f}" for s, st in top[:4]
+                        if s not in ("physics", "vision"))
+        print(f"{name:<28} {res['fps']:8.1f} FPS  x{res['realtime_factor']:5.1f} реального времени  "
+              f"пуль {res['bullets_in_air']:4d} | мс p50/p95: {top}")
+
+    calibration = min(calibration, calibrate())
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "frames": args.frames,
+            "warmup": args.warmup,
+            "repeat": args.repeat,
+            "calibration_sec": calibration,
+            "seed": args.seed,
+            "physics_hz": args.physics_hz,
+        },
+        "scenarios": results,
+    }
+
+    out = args.out or f"data/bench/bench_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Результаты: {out}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Базовый прогон обновлен: {BASELINE_PATH}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        # Поправка на скорость машины (другой CPU, турбобуст, соседи по серверу)
+        speed = 1.0
+        ref_cal = baseline.get("meta", {}).get("calibration_sec")
+        if ref_cal and not args.no_calibration:
+            speed = ref_cal / calibration
+            print(f"Машина быстрее базового прогона в {speed:.2f} раза (калибровка)")
+        fps_problems, stage_problems = compare(results, baseline, args.tolerance, speed)
+        if stage_problems:
+            print(f"\nМедленнее базового {args.baseline} (допуск {args.tolerance:.0%}):")
+            for p in stage_problems:
+                print(f"  {p}")
+        problems = fps_problems + (stage_problems if args.strict_stages else [])
+        if problems:
+            print(f"\nРЕГРЕССИЯ относительно {args.baseline} (допуск {args.tolerance:.0%}):")
+            for p in problems:
+                print(f"  {p}")
+            raise SystemExit(1)
+        print(f"Регрессий относительно {args.baseline} нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Сравнение корректоров на одном журнале выстрелов: BallisticsNet (torch и NumPy)
+против полиномиального RLS. Ошибка поправки на отложенных строках журнала
+и задержка одного вызова get_correction.
+Отложены те же строки, что train.py берет в валидацию (holdout_mask с тем же
+--val-frac): сеть их не видела, RLS учится на остальных — сравнение на равных.
+
+    python compare_correctors.py --data data/dataset_01.shots
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from tur_sim.fused_corrector import FusedCorrector
+from tur_sim.rls_corrector import RLSCorrector
+from tur_sim.shot_log import holdout_mask, iter_row_chunks
+
+FEATURES = ["err_yaw", "err_pitch", "v_yaw", "v_pitch", "dist", "turret_pitch"]
+LABELS = ["delta_yaw", "delta_pitch"]
+
+
+def call_latency(corrector, states, repeat=3):
+    """Лучшее среднее время одного get_correction (мкс)"""
+    rows = [tuple(float(v) for v in s) for s in states]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            corrector.get_correction(*row)
+        best = min(best, (time.perf_counter() - start) / len(rows))
+    return best * 1e6
+
+
+def errors(pred, y):
+    err = pred - y
+    rmse = np.sqrt(np.mean(err ** 2, axis=0))
+    mae = np.mean(np.abs(err), axis=0)
+    return rmse, mae
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BallisticsNet vs RLS на одном журнале")
+    parser.add_argument("--data", default="data/dataset_01.csv")
+    parser.add_argument("--val-frac", type=float, default=0.2,
+                        help="доля отложенных строк — как --val-frac при обучении сети в train.py")
+    parser.add_argument("--latency-calls", type=int, default=2000)
+    parser.add_argument("--forget", type=float, default=RLSCorrector.FORGET)
+    args = parser.parse_args()
+
+    # Строки без NaN и их номера в журнале — так же, как читает train.py
+    chunks = list(iter_row_chunks(args.data, FEATURES + LABELS))
+    rows = np.concatenate([r for r, _ in chunks]) if chunks else np.empty(0, dtype=int)
+    block = np.concatenate([b for _, b in chunks]) if chunks else np.empty((0, len(FEATURES + LABELS)))
+    X, y = block[:, :len(FEATURES)], block[:, len(FEATURES):]
+
+    test = holdout_mask(rows, args.val_frac)
+    X_train, y_train = X[~test], y[~test]
+    X_test, y_test = X[test], y[test]
+    print(f"Строк: {len(X)} (обучение {len(X_train)}, проверка {len(X_test)})")
+
+    results = []
+    lat_states = X_test[:args.latency_calls]
+
+    # Без поправки — нижняя планка
+    results.append(("без поправки", *errors(np.zeros_like(y_test), y_test), 0.0, ""))
+
+    # RLS: масштабы входов по обучающей части, затем потоковое обучение
+    rls = RLSCorrector(path=None, forget=args.forget)
+    rls.fit_scaling(X_train)
+    start = time.perf_counter()
+    rls.update_batch(X_train, y_train)
+    update_us = (time.perf_counter() - start) / max(len(X_train), 1) * 1e6
+    pred = rls.get_correction_batch(X_test)
+    results.append(("RLS", *errors(pred, y_test), call_latency(rls, lat_states),
+                    f"update {update_us:.1f} мкс"))
+
+    # RLS и дальше учится после каждого выстрела: предсказал -> обновился
+    pred = np.empty_like(y_test)
+    for i, (s, d) in enumerate(zip(X_test, y_test)):
+        pred[i] = rls.get_correction(*s)
+        rls.update(s, d)
+    results.append(("RLS онлайн", *errors(pred, y_test), 0.0, "предсказание до обновления"))
+
+    # BallisticsNet: обучена train.py на строках вне holdout_mask
+    if os.path.exists(FusedCorrector.MODEL_PATH):
+        fused = FusedCorrector()
+        pred = fused.get_correction_batch(X_test)
+        results.append(("Net (NumPy)", *errors(pred, y_test), call_latency(fused, lat_states), ""))
+
+    from tur_sim.ballistics_corrector import BallisticsCorrector
+    if os.path.exists(BallisticsCorrector.MODEL_PATH):
+        net = BallisticsCorrector()
+        if net.is_ready:
+            pred = net.get_correction_batch(X_test)
+            results.append(("Net (torch)", *errors(pred, y_test), call_latency(net, lat_states), ""))
+
+    print(f"\n{'корректор':<14} {'RMSE yaw':>10} {'RMSE pitch':>11} {'MAE yaw':>10} {'MAE pitch':>10} {'мкс/вызов':>10}")
+    for name, rmse, mae, lat, note in results:
+        lat_s = f"{lat:10.1f}" if lat else f"{'-':>10}"
+        print(f"{name:<14} {rmse[0]:10.5f} {rmse[1]:11.5f} {mae[0]:10.5f} {mae[1]:10.5f} {lat_s}  {note}")
+
+
+if __name__ == "__main__":
+    main()
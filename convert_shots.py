@@ -0,0 +1,47 @@
+"""
+Конвертация журналов выстрелов: CSV (старый BallisticsLogger) <-> ShotLog (*.shots).
+
+    python convert_shots.py data/dataset_01.csv                  # -> data/dataset_01.shots
+    python convert_shots.py data/dataset_01.shots --to-csv       # -> data/dataset_01.csv
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from tur_sim.shot_log import ShotLog, convert_csv
+
+
+def to_csv(log_path, csv_path, chunk_size):
+    log = ShotLog(log_path)
+    header = ",".join(log.columns)
+    with open(csv_path, "w", newline="") as f:
+        f.write(header + "\n")
+        for _, block in log.iter_chunks(log.columns, chunk_size):
+            np.savetxt(f, block, delimiter=",", fmt="%.17g")
+    return len(log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV <-> ShotLog")
+    parser.add_argument("src")
+    parser.add_argument("dst", nargs="?")
+    parser.add_argument("--to-csv", action="store_true", help="обратно из *.shots в CSV")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    base = os.path.splitext(args.src.rstrip("/"))[0]
+    t0 = time.perf_counter()
+    if args.to_csv:
+        dst = args.dst or base + ".csv"
+        rows = to_csv(args.src, dst, args.chunk_size)
+    else:
+        dst = args.dst or base + ShotLog.EXT
+        rows = convert_csv(args.src, dst, args.chunk_size)
+
+    print(f"{args.src} -> {dst}: {rows} строк за {time.perf_counter() - t0:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Экспорт нейро-корректора в чистый NumPy (скалеры вшиты в слои) и сравнение
+задержки одного вызова get_correction: torch + sklearn против NumPy.
+
+    python export_corrector.py              # экспорт в data/ballistics_model.npz
+    python export_corrector.py --bench      # экспорт + замер
+"""
+import argparse
+import time
+
+import numpy as np
+
+from tur_sim.ballistics_corrector import BallisticsCorrector
+from tur_sim.fused_corrector import FusedCorrector
+
+
+def random_states(n, seed=0):
+    """Правдоподобные входы: ошибки и скорости в радианах, дистанция в метрах"""
+    rng = np.random.default_rng(seed)
+    states = np.empty((n, 6))
+    states[:, 0:2] = rng.normal(0, 0.01, (n, 2))
+    states[:, 2:4] = rng.normal(0, 0.3, (n, 2))
+    states[:, 4] = rng.uniform(5, 50, n)
+    states[:, 5] = rng.uniform(-0.3, 0.5, n)
+    return states
+
+
+def time_calls(corrector, states, repeat):
+    rows = [tuple(float(v) for v in s) for s in states]
+    for row in rows[:50]:  # прогрев
+        corrector.get_correction(*row)
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            corrector.get_correction(*row)
+        best = min(best, (time.perf_counter() - start) / len(rows))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Экспорт BallisticsCorrector в NumPy")
+    parser.add_argument("--out", default=BallisticsCorrector.FUSED_PATH)
+    parser.add_argument("--bench", action="store_true", help="замерить задержку после экспорта")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    source = BallisticsCorrector()
+    if not source.is_ready:
+        raise SystemExit("нет обученной модели для экспорта")
+
+    path = source.export_fused(args.out)
+    print(f"Экспортировано: {path}")
+
+    fused = FusedCorrector(path)
+
+    # Проверка совпадения ответов
+    states = random_states(args.calls)
+    ref = np.array([source.get_correction(*s) for s in states[:200]])
+    new = np.array([fused.get_correction(*s) for s in states[:200]])
+    err = np.abs(ref - new).max()
+    print(f"Макс. расхождение: {err:.3e} рад (torch считает во float32)")
+
+    if not args.bench:
+        return
+
+    t_torch = time_calls(source, states, args.repeat)
+    t_numpy = time_calls(fused, states, args.repeat)
+    print(f"torch + sklearn: {t_torch * 1e6:8.1f} мкс/вызов")
+    print(f"NumPy fused:     {t_numpy * 1e6:8.1f} мкс/вызов")
+    print(f"Ускорение:       {t_torch / t_numpy:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,222 @@
-import pandas as pd
-import torch
-import joblib
+"""
+Проверка корректора на отложенном журнале выстрелов целиком (пачками).
+Для каждой модели:
+  MAE/RMSE delta_yaw/delta_pitch — всего, по дистанции и по угловой скорости цели;
+  расчетная доля попаданий без поправки и с поправкой модели
+    (промах dist * |delta - поправка| меньше радиуса цели);
+  скорость предсказания, строк/с.
 
-from tur_sim.ballistics_corrector import BallisticsCorrector
+Модель задается как backend[:файлы]:
+  net                         — BallisticsCorrector (data/ballistics_model.pth + скалеры)
+  net:cand.pth[,sx.pkl,sy.pkl] — кандидат BallisticsNet
+  fused[:model.npz]           — FusedCorrector
+  rls[:rls.npz]               — RLSCorrector
+  none                        — без поправки
 
-# Загрузка
-df = pd.read_csv("data/dataset_01.csv")
-# Берем 10-ю строку для примера
-row = 25
-test_input = df.iloc[row, 0:6].values
-true_delta = df.iloc[row, 6:8].values
+--gate: первая модель — кандидат, должна быть не хуже остальных по RMSE
+и расчетной доле попаданий (с допусками --rmse-tol/--hit-tol), иначе код
+выхода 1 (проверка перед заменой data/ballistics_model.pth). Нужно минимум
+две --model: кандидат и эталон, с одной моделью --gate завершается с ошибкой.
 
-# Твой класс корректора
+    python test.py data/holdout.shots --model net:data/candidate.pth --model net --gate
+"""
+import argparse
+import json
+import sys
+import time
 
-corr = BallisticsCorrector()
+import numpy as np
 
-pred_delta = corr.get_correction(*test_input)
+from tur_sim.shot_log import holdout_mask, iter_row_chunks
 
-print(f"Истинная дельта из файла: {true_delta}")
-print(f"Предсказанная ИИ дельта:  {pred_delta}")
\ No newline at end of file
+FEATURES = ["err_yaw", "err_pitch", "v_yaw", "v_pitch", "dist", "turret_pitch"]
+LABELS = ["delta_yaw", "delta_pitch"]
+
+TARGET_RADIUS = 0.5  # м, как Controller.TARGET_RADIUS
+
+
+def load_corrector(spec):
+    """'backend[:путь[,путь...]]' -> корректор с get_correction_batch"""
+    backend, _, files = spec.partition(":")
+    files = [f for f in files.split(",") if f]
+
+    if backend == "none":
+        return None
+    if backend == "net":
+        from tur_sim.ballistics_corrector import BallisticsCorrector
+        corrector = BallisticsCorrector(*files)
+    elif backend == "fused":
+        from tur_sim.fused_corrector import FusedCorrector
+        corrector = FusedCorrector(*files)
+    elif backend == "rls":
+        from tur_sim.rls_corrector import RLSCorrector
+        corrector = RLSCorrector(*files)
+    else:
+        raise SystemExit(f"Неизвестный тип модели: {backend}")
+
+    if not corrector.is_ready:
+        raise SystemExit(f"Модель {spec} не загружена")
+    return corrector
+
+
+def iter_batches(path, batch_size, val_frac=0.0):
+    """
+    Пачки (X [n, 6], y [n, 2]) из ShotLog (*.shots) или CSV; строки с NaN пропускаются.
+    Чтение и номера строк — те же, что в train.py (iter_row_chunks), поэтому
+    --val-frac отбирает ровно строки, которые train.py отложил в валидацию
+    """
+    for rows, block in iter_row_chunks(path, FEATURES + LABELS, batch_size):
+        if val_frac > 0:
+            block = block[holdout_mask(rows, val_frac)]
+        if len(block):
+            yield block[:, :len(FEATURES)], block[:, len(FEATURES):]
+
+
+class Buckets:
+    """Накопление ошибок по корзинам значения: count, сумма |err|, сумма err^2, попадания"""
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        n = len(self.edges) - 1
+        self.count = np.zeros(n)
+        self.abs_sum = np.zeros((n, len(LABELS)))
+        self.sq_sum = np.zeros((n, len(LABELS)))
+        self.hits_base = np.zeros(n)
+        self.hits_model = np.zeros(n)
+
+    def add(self, values, err, hit_base, hit_model):
+        idx = np.searchsorted(self.edges, values, side="right") - 1
+        ok = (idx >= 0) & (idx < len(self.count))
+        idx, err = idx[ok], err[ok]
+        n = len(self.count)
+        self.count += np.bincount(idx, minlength=n)
+        self.hits_base += np.bincount(idx, weights=hit_base[ok], minlength=n)
+        self.hits_model += np.bincount(idx, weights=hit_model[ok], minlength=n)
+        for j in range(len(LABELS)):
+            self.abs_sum[:, j] += np.bincount(idx, weights=np.abs(err[:, j]), minlength=n)
+            self.sq_sum[:, j] += np.bincount(idx, weights=err[:, j] ** 2, minlength=n)
+
+    def rows(self):
+        out = []
+        for i in range(len(self.count)):
+            c = self.count[i]
+            if c == 0:
+                continue
+            row = {"from": float(self.edges[i]), "to": float(self.edges[i + 1]), "count": int(c)}
+            for j, name in enumerate(LABELS):
+                row[f"mae_{name}"] = self.abs_sum[i, j] / c
+                row[f"rmse_{name}"] = float(np.sqrt(self.sq_sum[i, j] / c))
+            row["hit_base"] = self.hits_base[i] / c
+            row["hit_model"] = self.hits_model[i] / c
+            out.append(row)
+        return out
+
+
+def evaluate(corrector, path, batch_size, dist_edges, speed_edges, radius, val_frac):
+    total = Buckets([-np.inf, np.inf])
+    by_dist = Buckets(dist_edges)
+    by_speed = Buckets(speed_edges)
+    infer_time = 0.0
+
+    for X, y in iter_batches(path, batch_size, val_frac):
+        start = time.perf_counter()
+        pred = np.zeros_like(y) if corrector is None else corrector.get_correction_batch(X)
+        infer_time += time.perf_counter() - start
+
+        err = y - pred
+        dist = X[:, FEATURES.index("dist")]
+        speed = np.hypot(X[:, FEATURES.index("v_yaw")], X[:, FEATURES.index("v_pitch")])
+        # Промах в метрах на дистанции цели
+        hit_base = (dist * np.hypot(y[:, 0], y[:, 1]) < radius).astype(float)
+        hit_model = (dist * np.hypot(err[:, 0], err[:, 1]) < radius).astype(float)
+
+        for b, values in ((total, dist), (by_dist, dist), (by_speed, speed)):
+            b.add(values, err, hit_base, hit_model)
+
+    summary = total.rows()[0] if total.count[0] else {"count": 0}
+    summary.pop("from", None)
+    summary.pop("to", None)
+    summary["samples_per_sec"] = summary["count"] / infer_time if infer_time > 0 else float("inf")
+    return {"total": summary, "by_dist": by_dist.rows(), "by_speed": by_speed.rows()}
+
+
+def print_table(title, rows):
+    print(f"  {title}:")
+    print(f"    {'диапазон':>13} {'строк':>8} {'MAE yaw':>9} {'RMSE yaw':>9} "
+          f"{'MAE pitch':>9} {'RMSE pitch':>10} {'попад.':>13}")
+    for r in rows:
+        print(f"    {r['from']:>6.2f}-{r['to']:<6.2f} {r['count']:>8d} "
+              f"{r['mae_delta_yaw']:>9.5f} {r['rmse_delta_yaw']:>9.5f} "
+              f"{r['mae_delta_pitch']:>9.5f} {r['rmse_delta_pitch']:>10.5f} "
+              f"{r['hit_base']:>6.1%}->{r['hit_model']:<6.1%}")
+
+
+def total_rmse(result):
+    t = result["total"]
+    return float(np.hypot(t["rmse_delta_yaw"], t["rmse_delta_pitch"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Оценка корректора на отложенном журнале")
+    parser.add_argument("data", nargs="?", default="data/dataset_01.csv", help="журнал *.shots / *.csv")
+    parser.add_argument("--model", action="append", help="backend[:файлы], можно несколько (по умолчанию net)")
+    parser.add_argument("--batch-size", type=int, default=65536)
+    parser.add_argument("--val-frac", type=float, default=0.0,
+                        help="брать только строки, отложенные train.py с этой долей (0 — весь журнал)")
+    parser.add_argument("--dist-bins", default="0,10,20,30,40,60,1000", help="границы дистанции, м")
+    parser.add_argument("--speed-bins", default="0,0.2,0.4,0.6,0.8,10", help="границы угловой скорости цели, рад/с")
+    parser.add_argument("--radius", type=float, default=TARGET_RADIUS, help="радиус цели для расчета попаданий, м")
+    parser.add_argument("--gate", action="store_true", help="первая модель должна быть не хуже остальных")
+    parser.add_argument("--rmse-tol", type=float, default=0.01, help="допустимый рост RMSE для --gate (доля)")
+    parser.add_argument("--hit-tol", type=float, default=0.005, help="допустимое падение доли попаданий для --gate")
+    parser.add_argument("--json", help="сохранить результаты в файл")
+    args = parser.parse_args()
+
+    specs = args.model or ["net"]
+    if args.gate and len(specs) < 2:
+        raise SystemExit("--gate: нужны кандидат и хотя бы одна эталонная --model")
+    dist_edges = [float(v) for v in args.dist_bins.split(",")]
+    speed_edges = [float(v) for v in args.speed_bins.split(",")]
+
+    results = {}
+    for spec in specs:
+        corrector = load_corrector(spec)
+        res = evaluate(corrector, args.data, args.batch_size, dist_edges, speed_edges,
+                       args.radius, args.val_frac)
+        results[spec] = res
+
+        t = res["total"]
+        if t["count"] == 0:
+            raise SystemExit(f"В {args.data} нет строк для проверки")
+        print(f"\n{spec}: строк {t['count']}, {t['samples_per_sec']:,.0f} строк/с")
+        print(f"  delta_yaw:   MAE {t['mae_delta_yaw']:.5f}  RMSE {t['rmse_delta_yaw']:.5f} рад")
+        print(f"  delta_pitch: MAE {t['mae_delta_pitch']:.5f}  RMSE {t['rmse_delta_pitch']:.5f} рад")
+        print(f"  попадания (расчет): {t['hit_base']:.1%} без поправки -> {t['hit_model']:.1%} "
+              f"({t['hit_model'] - t['hit_base']:+.1%})")
+        print_table("по дистанции, м", res["by_dist"])
+        print_table("по угловой скорости цели, рад/с", res["by_speed"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"data": args.data, "results": results}, f, indent=2)
+
+    if args.gate:
+        cand = results[specs[0]]
+        failed = []
+        for spec in specs[1:]:
+            ref = results[spec]
+            if total_rmse(cand) > total_rmse(ref) * (1 + args.rmse_tol):
+                failed.append(f"RMSE хуже, чем у {spec}: {total_rmse(cand):.5f} > {total_rmse(ref):.5f}")
+            if cand["total"]["hit_model"] < ref["total"]["hit_model"] - args.hit_tol:
+                failed.append(f"попаданий меньше, чем у {spec}: "
+                              f"{cand['total']['hit_model']:.1%} < {ref['total']['hit_model']:.1%}")
+        if failed:
+            print(f"\nGATE: {specs[0]} НЕ ПРОШЛА")
+            for msg in failed:
+                print(f"  {msg}")
+            sys.exit(1)
+        print(f"\nGATE: {specs[0]} прошла")
+
+
+if __name__ == "__main__":
+    main()
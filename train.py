@@ -1,72 +1,211 @@
-import pandas as pd
+"""
+Обучение BallisticsNet на датасетах любого размера.
+
+Данные читаются с диска кусками (в память целиком не грузятся):
+  1. первый проход — StandardScaler.partial_fit по кускам;
+  2. эпохи — мини-батчи из потока кусков (DataLoader с воркерами),
+     валидация на отложенных строках после каждой эпохи.
+Ранняя остановка по плато валидационной ошибки. Лучшая модель, скалеры
+и NumPy-экспорт (ballistics_model.npz) сохраняются в --out (по умолчанию
+data/candidate/), а не поверх рабочей модели: сначала проверка test.py --gate,
+потом замена. --out data пишет сразу на место рабочей модели (вместе с .npz).
+
+    python train.py --data data/dataset_01.shots --workers 4
+    python test.py data/holdout.shots --model net:data/candidate/ballistics_model.pth,\
+data/candidate/scaler_x.pkl,data/candidate/scaler_y.pkl --model net --gate
+"""
+import argparse
+import os
+import time
+
+import joblib  # для сохранения скалера
 import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-import joblib  # для сохранения скалера
+from torch.utils.data import DataLoader, IterableDataset, get_worker_info
+
+from tur_sim.ballistics_corrector import BallisticsCorrector, BallisticsNet
+from tur_sim.shot_log import chunk_ranges, holdout_mask, iter_row_chunks
+
+# Входные параметры (Features) и целевые поправки (Labels)
+FEATURES = ["err_yaw", "err_pitch", "v_yaw", "v_pitch", "dist", "turret_pitch"]
+LABELS = ["delta_yaw", "delta_pitch"]
+
+
+def iter_chunks(path, chunk_size, ranges=None):
+    """
+    Куски датасета: (номера строк [n], X [n, 6], y [n, 2]). ShotLog (*.shots) или CSV.
+    ranges — подмножество chunk_ranges: читаются и разбираются только эти куски
+    """
+    for rows, block in iter_row_chunks(path, FEATURES + LABELS, chunk_size, ranges):
+        yield rows, block[:, :len(FEATURES)], block[:, len(FEATURES):]
+
+
+def fit_scalers(path, chunk_size, ranges=None):
+    """Первый проход: скалеры по всему файлу, не загружая его в память"""
+    scaler_x = StandardScaler()
+    scaler_y = StandardScaler()
+    rows = 0
+    for _, X, y in iter_chunks(path, chunk_size, ranges):
+        if len(X):
+            scaler_x.partial_fit(X)
+            scaler_y.partial_fit(y)
+            rows += len(X)
+    return scaler_x, scaler_y, rows
+
+
+class ShotStream(IterableDataset):
+    """
+    Поток мини-батчей масштабированных строк из файла.
+    Границы кусков (ranges) считаются один раз в главном процессе; воркер DataLoader
+    читает и разбирает только свои куски, так что разбор CSV делится между воркерами.
+    Внутри куска строки перемешиваются.
+    Батчи собираются сразу массивами (без поштучной склейки в DataLoader).
+    """
+
+    def __init__(self, path, chunk_size, batch_size, scaler_x, scaler_y, val_frac, validation,
+                 seed=0, ranges=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.ranges = ranges if ranges is not None else chunk_ranges(path, chunk_size)
+        self.batch_size = batch_size
+        self.mean_x, self.scale_x = scaler_x.mean_, scaler_x.scale_
+        self.mean_y, self.scale_y = scaler_y.mean_, scaler_y.scale_
+        self.val_frac = val_frac
+        self.validation = validation
+        self.seed = seed
+        self.epoch = 0
+
+    def __iter__(self):
+        info = get_worker_info()
+        worker, n_workers = (info.id, info.num_workers) if info else (0, 1)
+        rng = np.random.default_rng((self.seed, self.epoch, worker))
+
+        for rows, X, y in iter_chunks(self.path, self.chunk_size, self.ranges[worker::n_workers]):
+            mask = holdout_mask(rows, self.val_frac)
+            if not self.validation:
+                mask = ~mask
+            X = ((X[mask] - self.mean_x) / self.scale_x).astype(np.float32)
+            y = ((y[mask] - self.mean_y) / self.scale_y).astype(np.float32)
+
+            if not self.validation:
+                order = rng.permutation(len(X))
+                X, y = X[order], y[order]
+            for j in range(0, len(X), self.batch_size):
+                yield torch.from_numpy(X[j:j + self.batch_size]), torch.from_numpy(y[j:j + self.batch_size])
+
+
+def make_loader(dataset, workers):
+    # batch_size=None: датасет сам отдает готовые батчи
+    return DataLoader(dataset, batch_size=None, num_workers=workers)
+
+
+def evaluate(model, loader, criterion):
+    model.eval()
+    total, count = 0.0, 0
+    with torch.no_grad():
+        for inputs, targets in loader:
+            total += criterion(model(inputs), targets).item() * len(inputs)
+            count += len(inputs)
+    model.train()
+    return total / max(count, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Обучение BallisticsNet (потоково, мини-батчи)")
+    parser.add_argument("--data", default="data/dataset_01.csv")
+    parser.add_argument("--out", default="data/candidate",
+                        help="каталог для модели, скалеров и .npz (data — заменить рабочую модель)")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="строк на кусок чтения")
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=2, help="воркеры DataLoader")
+    parser.add_argument("--val-frac", type=float, default=0.2, help="доля строк в валидации")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--patience", type=int, default=10, help="эпох без улучшения до остановки")
+    parser.add_argument("--min-delta", type=float, default=1e-5)
+    # Уменьшаем lr до 0.0005 для более точной подстройки
+    parser.add_argument("--lr", type=float, default=0.0005)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+
+    # 1. Масштабирование (Scale) — отдельным проходом по файлу
+    t0 = time.perf_counter()
+    ranges = chunk_ranges(args.data, args.chunk_size)
+    scaler_x, scaler_y, rows = fit_scalers(args.data, args.chunk_size, ranges)
+    print(f"Строк: {rows}, скалеры за {time.perf_counter() - t0:.1f} с")
+
+    train_set = ShotStream(args.data, args.chunk_size, args.batch_size, scaler_x, scaler_y,
+                           args.val_frac, validation=False, seed=args.seed, ranges=ranges)
+    val_set = ShotStream(args.data, args.chunk_size, args.batch_size * 4, scaler_x, scaler_y,
+                         args.val_frac, validation=True, ranges=ranges)
+    train_loader = make_loader(train_set, args.workers)
+    val_loader = make_loader(val_set, args.workers)
+
+    model = BallisticsNet()
+    criterion = nn.MSELoss()
+    optimizer = optim.Adam(model.parameters(), lr=args.lr)
+
+    # Имена файлов те же, что у рабочей модели: --out data заменяет ее целиком
+    model_path = os.path.join(args.out, os.path.basename(BallisticsCorrector.MODEL_PATH))
+    scaler_x_path = os.path.join(args.out, os.path.basename(BallisticsCorrector.SCALLER_X_PATH))
+    scaler_y_path = os.path.join(args.out, os.path.basename(BallisticsCorrector.SCALLER_Y_PATH))
+    fused_path = os.path.join(args.out, os.path.basename(BallisticsCorrector.FUSED_PATH))
+    os.makedirs(args.out, exist_ok=True)
+    best_loss = float("inf")
+    bad_epochs = 0
+
+    # 2. Цикл обучения
+    for epoch in range(args.epochs):
+        train_set.epoch = epoch
+        t0 = time.perf_counter()
+        seen = 0
+        train_sum = 0.0
+
+        for inputs, targets in train_loader:
+            optimizer.zero_grad()
+            loss = criterion(model(inputs), targets)
+            loss.backward()
+            optimizer.step()
+
+            seen += len(inputs)
+            train_sum += loss.item() * len(inputs)
+
+        train_time = time.perf_counter() - t0
+        val_loss = evaluate(model, val_loader, criterion)
+        train_loss = train_sum / max(seen, 1)
+
+        improved = val_loss < best_loss - args.min_delta
+        print(f"Epoch {epoch}, Loss: {train_loss:.6f}, Val: {val_loss:.6f}, "
+              f"{seen / max(train_time, 1e-9):.0f} samples/s" + ("  *" if improved else ""))
+
+        if improved:
+            # 3. Сохранение лучшей модели вместе со скалерами
+            best_loss = val_loss
+            bad_epochs = 0
+            torch.save(model.state_dict(), model_path)
+            joblib.dump(scaler_x, scaler_x_path)
+            joblib.dump(scaler_y, scaler_y_path)
+        else:
+            bad_epochs += 1
+            if bad_epochs >= args.patience:
+                print(f"Плато {args.patience} эпох — остановка")
+                break
+
+    if best_loss == float("inf"):
+        raise SystemExit("Модель не сохранена: нет валидационных строк")
+
+    # NumPy-версия рядом с .pth, чтобы .npz (его грузит Controller при AI_FUSED) не отставал
+    BallisticsCorrector(model_path, scaler_x_path, scaler_y_path).export_fused(fused_path)
+    print(f"Обучение завершено. Лучшая Val: {best_loss:.6f}, модель: {model_path}, NumPy: {fused_path}")
+    if os.path.abspath(args.out) != os.path.abspath(os.path.dirname(BallisticsCorrector.MODEL_PATH)):
+        print(f"Кандидат. Проверка: python test.py <holdout> --model net:{model_path},"
+              f"{scaler_x_path},{scaler_y_path} --model net --gate; замена — скопировать файлы в "
+              f"{os.path.dirname(BallisticsCorrector.MODEL_PATH)}/")
+
 
-# 1. Загрузка данных
-df = pd.read_csv("data/dataset_01.csv")
-
-print("Колонки в файле:", df.columns.tolist())
-
-# Входные параметры (Features)
-X = df[["err_yaw", "err_pitch", "v_yaw", "v_pitch", "dist", "turret_pitch"]].values
-# Целевые поправки (Labels)
-y = df[["delta_yaw", "delta_pitch"]].values
-
-# 2. Масштабирование (Scale)
-scaler_x = StandardScaler()
-scaler_y = StandardScaler()
-
-X_scaled = scaler_x.fit_transform(X)
-y_scaled = scaler_y.fit_transform(y)
-
-X_train, X_test, y_train, y_test = train_test_split(X_scaled, y_scaled, test_size=0.2)
-
-
-# 3. Архитектура нейросети
-class BallisticsNet(nn.Module):
-    def __init__(self):
-        super(BallisticsNet, self).__init__()
-        self.net = nn.Sequential(
-            nn.Linear(6, 128),  # Больше нейронов
-            nn.LeakyReLU(),  # Более гибкая функция активации
-            nn.Linear(128, 128),
-            nn.LeakyReLU(),
-            nn.Linear(128, 64),
-            nn.LeakyReLU(),
-            nn.Linear(64, 2)
-        )
-
-    def forward(self, x):
-        return self.net(x)
-
-
-model = BallisticsNet()
-criterion = nn.MSELoss()
-# Уменьшаем lr до 0.0005 для более точной подстройки
-optimizer = optim.Adam(model.parameters(), lr=0.0005)
-
-# 4. Цикл обучения
-epochs = 2000
-for epoch in range(epochs):
-    inputs = torch.FloatTensor(X_train)
-    targets = torch.FloatTensor(y_train)
-
-    optimizer.zero_grad()
-    outputs = model(inputs)
-    loss = criterion(outputs, targets)
-    loss.backward()
-    optimizer.step()
-
-    if epoch % 10 == 0:
-        print(f"Epoch {epoch}, Loss: {loss.item():.6f}")
-
-# 5. Сохранение
-torch.save(model.state_dict(), "ballistics_model.pth")
-joblib.dump(scaler_x, "scaler_x.pkl")
-joblib.dump(scaler_y, "scaler_y.pkl")
-print("Обучение завершено. Модель сохранена.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
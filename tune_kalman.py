@@ -0,0 +1,198 @@
+"""
+Подбор параметров фильтра Калмана (q_acc, r_noise) на headless прогонах Controller.
+
+Каждая точка оценивается на нескольких seed-ах в пуле процессов:
+  - согласованность фильтра: средние NIS и NEES (для 3D в идеале ~3)
+  - ошибка прогноза позиции на время полета пули
+  - процент попаданий автоматической стрельбы
+
+Примеры:
+    python tune_kalman.py --mode grid --steps 6 --seeds 3 --duration 60
+    python tune_kalman.py --mode random --samples 40 --workers 8 --export
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tur_sim.controller import Controller
+from tur_sim.headless_runner import HeadlessRunner
+from tur_sim.kalman_predictor import KalmanPredictor
+
+
+class ConsistencyProbe:
+    """Снимает NIS / NEES и ошибку прогноза на время полета после каждого шага"""
+
+    WARMUP_UPDATES = 10  # первые обновления трека не учитываем (переходный процесс)
+
+    def __init__(self):
+        self.nis = []
+        self.nees = []
+        self.pred_err = []
+        self.pending = deque()  # (время проверки, предсказанная позиция)
+
+        self._kalman = None
+        self._innovation = None
+        self._updates = 0
+
+    def __call__(self, controller):
+        now = controller.clock.now()
+        truth = controller.target_obj.pos
+
+        # 1. Сверяем прогнозы, время которых наступило
+        while self.pending and self.pending[0][0] <= now:
+            _, predicted = self.pending.popleft()
+            self.pred_err.append(np.linalg.norm(truth - predicted))
+
+        track = controller.active_track
+        if track is None:
+            return
+
+        kalman = track.kalman
+        if kalman is not self._kalman:
+            self._kalman = kalman
+            self._updates = 0
+
+        # Учитываем только шаги, на которых фильтр получил новое измерение
+        if kalman.last_innovation is self._innovation:
+            return
+        self._innovation = kalman.last_innovation
+        self._updates += 1
+        if self._updates <= self.WARMUP_UPDATES:
+            return
+
+        # 2. Согласованность: NIS из самого фильтра, NEES по истинной позиции
+        self.nis.append(kalman.last_nis)
+        err = truth - kalman.X[0:3]
+        self.nees.append(float(err @ np.linalg.solve(kalman.P[0:3, 0:3], err)))
+
+        # 3. Прогноз на время полета пули
+        t_fly = np.linalg.norm(kalman.X[0:3]) / controller.turret.projectile_speed
+        self.pending.append((now + t_fly, kalman.predict(t_fly)))
+
+
+def evaluate(params, seed, duration):
+    """Один прогон: возвращает метрики для набора параметров"""
+    runner = HeadlessRunner(seed=seed, kalman_params=params)
+    probe = ConsistencyProbe()
+    c = runner.run(duration, probe)
+
+    return {
+        "nis": float(np.mean(probe.nis)) if probe.nis else float("nan"),
+        "nees": float(np.mean(probe.nees)) if probe.nees else float("nan"),
+        "pred_err": float(np.mean(probe.pred_err)) if probe.pred_err else float("nan"),
+        "shots": c.shots_count,
+        "hits": c.hits_count,
+    }
+
+
+def _evaluate_job(job):
+    params, seed, duration = job
+    return evaluate(params, seed, duration)
+
+
+def make_candidates(args):
+    """Точки поиска в логарифмическом масштабе (как у слайдеров)"""
+    q_lo, q_hi = math.log10(KalmanPredictor.MIN_Q), math.log10(KalmanPredictor.MAX_Q)
+    r_lo, r_hi = math.log10(KalmanPredictor.MIN_R_NOISE), math.log10(KalmanPredictor.MAX_R_NOISE)
+
+    if args.mode == "grid":
+        return [
+            {"q_acc": float(q), "r_noise": float(r)}
+            for q in np.logspace(q_lo, q_hi, args.steps)
+            for r in np.logspace(r_lo, r_hi, args.steps)
+        ]
+
+    rng = np.random.default_rng(args.search_seed)
+    return [
+        {"q_acc": float(10 ** rng.uniform(q_lo, q_hi)),
+         "r_noise": float(10 ** rng.uniform(r_lo, r_hi))}
+        for _ in range(args.samples)
+    ]
+
+
+def score(row, args):
+    """Итоговая оценка (меньше — лучше)"""
+    consistency = 0.0
+    for key in ("nis", "nees"):
+        val = row[key]
+        consistency += abs(math.log(val / 3.0)) if val > 0 else 10.0
+
+    pred_err = row["pred_err"] if not math.isnan(row["pred_err"]) else 10.0
+    return (args.w_hit * (1.0 - row["hit_rate"])
+            + args.w_pred * pred_err
+            + args.w_cons * consistency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Подбор q_acc / r_noise фильтра Калмана")
+    parser.add_argument("--mode", choices=["grid", "random"], default="grid")
+    parser.add_argument("--steps", type=int, default=6, help="точек сетки по каждой оси")
+    parser.add_argument("--samples", type=int, default=30, help="точек случайного поиска")
+    parser.add_argument("--search-seed", type=int, default=0)
+    parser.add_argument("--seeds", type=int, default=3, help="прогонов (seed-ов) на точку")
+    parser.add_argument("--duration", type=float, default=60.0, help="секунд модельного времени")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--w-hit", type=float, default=1.0)
+    parser.add_argument("--w-pred", type=float, default=1.0)
+    parser.add_argument("--w-cons", type=float, default=0.25)
+    parser.add_argument("--out", default="data/kalman_tuning.csv")
+    parser.add_argument("--export", action="store_true",
+                        help=f"сохранить лучшую точку в {Controller.KALMAN_PARAMS_FILE}")
+    args = parser.parse_args()
+
+    candidates = make_candidates(args)
+    jobs = [(p, seed, args.duration) for p in candidates for seed in range(args.seeds)]
+    print(f"Точек: {len(candidates)}, прогонов: {len(jobs)}, процессов: {args.workers}")
+
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(_evaluate_job, jobs))
+
+    # Сводим прогоны по seed-ам
+    rows = []
+    for i, params in enumerate(candidates):
+        runs = results[i * args.seeds:(i + 1) * args.seeds]
+        shots = sum(r["shots"] for r in runs)
+        hits = sum(r["hits"] for r in runs)
+        row = dict(params)
+        for key in ("nis", "nees", "pred_err"):
+            row[key] = float(np.nanmean([r[key] for r in runs]))
+        row["shots"] = shots
+        row["hits"] = hits
+        row["hit_rate"] = hits / shots if shots else 0.0
+        row["score"] = score(row, args)
+        rows.append(row)
+
+    rows.sort(key=lambda r: r["score"])
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    headers = ["q_acc", "r_noise", "score", "hit_rate", "shots", "hits", "pred_err", "nis", "nees"]
+    with open(args.out, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: row[k] for k in headers})
+
+    print(f"Готово за {time.time() - started:.1f} c. Таблица: {args.out}")
+    for row in rows[:5]:
+        print(f"q_acc={row['q_acc']:.4f} r_noise={row['r_noise']:.5f} "
+              f"score={row['score']:.3f} hit={row['hit_rate']:.1%} "
+              f"pred_err={row['pred_err']:.3f} NIS={row['nis']:.2f} NEES={row['nees']:.2f}")
+
+    if args.export:
+        best = {"q_acc": rows[0]["q_acc"], "r_noise": rows[0]["r_noise"]}
+        os.makedirs(os.path.dirname(Controller.KALMAN_PARAMS_FILE) or ".", exist_ok=True)
+        with open(Controller.KALMAN_PARAMS_FILE, "w") as f:
+            json.dump(best, f, indent=2)
+        print(f"Лучшие параметры сохранены в {Controller.KALMAN_PARAMS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
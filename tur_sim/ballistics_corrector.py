@@ -3,6 +3,8 @@ import torch.nn as nn
 import joblib
 import numpy as np
 
+from .fused_corrector import FusedCorrector, fold_scalers
+
 # Описываем ту же архитектуру, что была при обучении
 class BallisticsNet(nn.Module):
     def __init__(self):
@@ -25,17 +27,19 @@ class BallisticsCorrector:
     MODEL_PATH = "data/ballistics_model.pth"
     SCALLER_X_PATH = "data/scaler_x.pkl"
     SCALLER_Y_PATH = "data/scaler_y.pkl"
+    FUSED_PATH = "data/ballistics_model.npz"
 
-    def __init__(self):
+    def __init__(self, model_path=MODEL_PATH, scaler_x_path=SCALLER_X_PATH, scaler_y_path=SCALLER_Y_PATH):
+        """Пути можно подменить, например чтобы проверить модель-кандидата (test.py)"""
         self.is_ready = False
         try:
             # 1. Загружаем скалеры
-            self.scaler_x = joblib.load( self.SCALLER_X_PATH )
-            self.scaler_y = joblib.load( self.SCALLER_Y_PATH )
+            self.scaler_x = joblib.load( scaler_x_path )
+            self.scaler_y = joblib.load( scaler_y_path )
 
             # 2. Загружаем модель
             self.model = BallisticsNet()
-            self.model.load_state_dict(torch.load( self.MODEL_PATH))
+            self.model.load_state_dict(torch.load( model_path))
             self.model.eval()  # Режим предсказания (отключает dropout и т.д.)
 
             self.is_ready = True
@@ -43,29 +47,54 @@ class BallisticsCorrector:
         except Exception as e:
             print(f"AI Corrector Error: Could not load model. {e}")
 
-    def get_correction(self, err_yaw, err_pitch, v_yaw, v_pitch, dist, turret_pitch):
+    def get_correction_batch(self, states):
         """
-        Принимает текущее состояние и возвращает (d_yaw, d_pitch) в радианах.
+        states [N, 6]: (err_yaw, err_pitch, v_yaw, v_pitch, dist, turret_pitch) построчно,
+        в том же порядке, что и в CSV.
+        Возвращает [N, 2]: (d_yaw, d_pitch) в радианах — один проход по сети на всю пачку.
         """
+        states = np.asarray(states, dtype=np.float64).reshape(-1, 6)
         if not self.is_ready:
-            return 0.0, 0.0
-
-        # Формируем вектор входа в том же порядке, что и в CSV
-        state = np.array([[
-            err_yaw, err_pitch, v_yaw, v_pitch, dist, turret_pitch
-        ]])
+            return np.zeros((len(states), 2))
 
         # 1. Масштабируем вход (Scale X)
-        state_scaled = self.scaler_x.transform(state)
+        state_scaled = self.scaler_x.transform(states)
 
         # 2. Прогоняем через нейросеть
         with torch.no_grad():
-            input_tensor = torch.FloatTensor(state_scaled)
+            input_tensor = torch.from_numpy(state_scaled.astype(np.float32))
             output_scaled = self.model(input_tensor).numpy()
 
         # 3. Обратное масштабирование выхода (Inverse Scale Y)
         # Получаем значения в радианах
-        correction = self.scaler_y.inverse_transform(output_scaled)
+        return self.scaler_y.inverse_transform(output_scaled)
+
+    def get_correction(self, err_yaw, err_pitch, v_yaw, v_pitch, dist, turret_pitch):
+        """
+        Принимает текущее состояние и возвращает (d_yaw, d_pitch) в радианах.
+        """
+        if not self.is_ready:
+            return 0.0, 0.0
+
+        correction = self.get_correction_batch(
+            [err_yaw, err_pitch, v_yaw, v_pitch, dist, turret_pitch]
+        )
+        return correction[0][0], correction[0][1]
 
-        # correction — это [[d_yaw, d_pitch]]
-        return correction[0][0], correction[0][1]
\ No newline at end of file
+    def export_fused(self, path=FUSED_PATH):
+        """
+        Сохраняет веса для FusedCorrector (чистый NumPy).
+        Скалеры вшиваются в первый и последний слои (fold_scalers).
+        """
+        if not self.is_ready:
+            raise RuntimeError("модель не загружена")
+
+        linears = [m for m in self.model.net if isinstance(m, nn.Linear)]
+        weights, biases = fold_scalers(
+            [m.weight.detach().double().numpy() for m in linears],
+            [m.bias.detach().double().numpy() for m in linears],
+            self.scaler_x.mean_, self.scaler_x.scale_,
+            self.scaler_y.mean_, self.scaler_y.scale_,
+        )
+        FusedCorrector.save(path, weights, biases)
+        return path
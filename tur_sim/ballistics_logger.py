@@ -1,10 +1,35 @@
 import csv
 import os
+import queue
+import threading
 import numpy as np
 
+from .shot_log import ShotLog, ShotLogWriter
+
 class BallisticsLogger:
-    def __init__(self, filename="ballistics_dataset.csv"):
+    """
+    Запись выстрелов для обучения нейросети.
+    log_shot только кладет строку в ограниченную очередь; на диск пишет фоновый поток
+    пачками (одна последовательная запись на пачку), так что медленный диск
+    не тормозит цикл управления.
+    При переполнении очереди: OVERFLOW_DROP — строка отбрасывается и считается,
+    OVERFLOW_BLOCK — вызывающий ждет, пока писатель освободит место.
+    """
+
+    OVERFLOW_DROP = "drop"
+    OVERFLOW_BLOCK = "block"
+
+    QUEUE_SIZE = 4096
+    BATCH_MAX = 1024  # строк на одну запись
+    FLUSH_INTERVAL = 0.5  # сек, как часто писатель сбрасывает неполную пачку
+
+    _STOP = object()
+
+    def __init__(self, filename="ballistics_dataset.csv", clock=None,
+                 queue_size=QUEUE_SIZE, overflow=OVERFLOW_DROP):
         self.filename = filename
+        # Часы симуляции: если заданы, к каждой записи добавляется метка времени
+        self.clock = clock
         self.headers = [
             "err_yaw", "err_pitch",
             "v_yaw", "v_pitch",
@@ -12,14 +37,53 @@ class BallisticsLogger:
             "delta_yaw", "delta_pitch",
             "is_hit"
         ]
-        self._prepare_file()
+        if self.clock is not None:
+            self.headers.append("time")
+
+        # *.shots — колоночный бинарный журнал (ShotLog), иначе CSV
+        self.writer = None
+        if self.filename.endswith(ShotLog.EXT):
+            self.writer = ShotLogWriter(self.filename, self.headers)
+        else:
+            self._prepare_file()
+        self.with_time = "time" in self.headers
+
+        if overflow not in (self.OVERFLOW_DROP, self.OVERFLOW_BLOCK):
+            raise ValueError(f"неизвестная политика переполнения: {overflow}")
+        self.overflow = overflow
+
+        # Счетчики для мониторинга
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.errors = 0
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.closed = False
+        self.thread = threading.Thread(target=self._writer_loop, name="BallisticsLogger", daemon=True)
+        self.thread.start()
 
     def _prepare_file(self):
-        """Создает файл с заголовками, если он еще не существует"""
-        if not os.path.exists(self.filename):
-            with open(self.filename, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(self.headers)
+        """
+        Создает файл с заголовками, если он еще не существует.
+        В существующий файл дописываем по его заголовку: колонку time добавляем,
+        только если она там уже есть (иначе строки съедут относительно заголовка)
+        """
+        if os.path.exists(self.filename) and os.path.getsize(self.filename) > 0:
+            with open(self.filename, newline='') as f:
+                existing = next(csv.reader(f), [])
+            if "time" in existing and "time" not in self.headers:
+                self.headers.append("time")
+            elif "time" not in existing and "time" in self.headers:
+                self.headers.remove("time")
+                print(f"BallisticsLogger: в {self.filename} нет колонки time, пишем без нее")
+            return
+
+        with open(self.filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.headers)
 
     def log_shot(self, state, miss_angles, is_hit):
         """
@@ -28,10 +92,95 @@ class BallisticsLogger:
         miss_angles: (delta_yaw, delta_pitch)
         is_hit: факт попадания
         """
+        if self.closed:
+            return
 
         # Собираем строку: данные состояния + координаты промаха + флаг попадания
         row = list(state) + list(miss_angles) + [is_hit]
+        if self.with_time:
+            row.append(self.clock.now() if self.clock is not None else float("nan"))
 
-        with open(self.filename, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(row)
+        try:
+            self.queue.put(row, block=self.overflow == self.OVERFLOW_BLOCK)
+        except queue.Full:
+            self.dropped += 1
+            return
+
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def stats(self):
+        """Счетчики для телеметрии и логов"""
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "pending": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+
+    def _writer_loop(self):
+        """Фоновый поток: собираем пачку и пишем ее одной записью"""
+        stop = False
+        while not stop:
+            try:
+                item = self.queue.get(timeout=self.FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+
+            batch = []
+            while True:
+                if item is self._STOP:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.BATCH_MAX:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write_batch(batch)
+
+        if self.writer is not None:
+            self.writer.close()
+
+    def _write_batch(self, batch):
+        try:
+            if self.writer is not None:
+                self.writer.append(np.array(batch, dtype=float))
+                self.writer.flush()
+            else:
+                with open(self.filename, 'a', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerows(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            # Любая ошибка (диск, битая строка) теряет только эту пачку, поток живет дальше
+            self.errors += 1
+            print(f"BallisticsLogger: ошибка записи {self.filename}, пачка {len(batch)} строк потеряна. {e}")
+
+    def close(self, timeout=5.0):
+        """
+        Дописывает все, что в очереди, и останавливает писатель (ждем не дольше timeout).
+        Возвращает число строк, которые так и не попали на диск
+        """
+        if self.closed:
+            return 0
+        self.closed = True
+        try:
+            self.queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            pass  # писатель стоит или не успевает — не висим на выходе
+        self.thread.join(timeout)
+
+        lost = self.enqueued - self.written
+        if lost or self.thread.is_alive():
+            print(f"BallisticsLogger: не записано {lost} строк в {self.filename}"
+                  + (" (писатель не остановился)" if self.thread.is_alive() else ""))
+        return lost
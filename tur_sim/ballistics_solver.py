@@ -1,28 +1,162 @@
 import math
 import numpy as np
 
+from .firing_table import FiringTable
+
+
 class BallisticsSolver:
     G = 9.81  # Ускорение свободного падения
 
+    # Таблицы стрельбы, построенные за время работы: (v_muzzle, g, drag_k) -> FiringTable
+    _firing_tables = {}
+
+    # Бюджет итераций перехвата на кадр и точность по времени полета (сек)
+    INTERCEPT_MAX_ITER = 8
+    INTERCEPT_TOL = 1e-4
+    INTERCEPT_MAX_T = 3.0  # дальше этого пуля не летит (lifetime снаряда)
+
     @staticmethod
     def get_lead_point(target_pos, target_velocity, v_muzzle):
         """
         target_pos: текущие мировые координаты [x, y, z]
         target_velocity: вектор скорости [vx, vy, vz]
         v_muzzle: начальная скорость пули
-        возвращает точку, куда надо целиться
+        возвращает точку, куда надо целиться (упреждение без учета гравитации)
         """
-        dist = np.linalg.norm(target_pos)
+        t_fly, _, _, _, _ = BallisticsSolver.solve_intercept(
+            target_pos, target_velocity, None, v_muzzle, g=0.0
+        )
+        t_fly = t_fly[0]
 
-        # 1. Приблизительное время полета
-        t_fly = dist / v_muzzle
+        # Прогноз позиции через уточненное время полета
+        lead_pos = np.asarray(target_pos, dtype=float) + np.asarray(target_velocity, dtype=float) * t_fly
+        return lead_pos
 
-        # 2. Прогноз позиции через t_fly секунд
-        lead_pos = target_pos + target_velocity * t_fly
+    @staticmethod
+    def solve_intercept(target_pos, target_vel, target_acc, v_muzzle, g=G,
+                        shooter_pos=None,
+                        max_iter=INTERCEPT_MAX_ITER, tol=INTERCEPT_TOL,
+                        max_t=INTERCEPT_MAX_T, table=None, t_offset=0.0):
+        """
+        Итеративное решение задачи перехвата (векторизовано по N целям / точкам).
 
-        # Для сверхточных систем можно итеративно уточнить t_fly
-        # на основе нового расстояния до lead_pos, но для начала хватит и этого.
-        return lead_pos
+        target_pos, target_vel, target_acc: [3] или [N, 3] (acc может быть None)
+        Движение цели: p(t) = p + v*t + a*t^2/2
+        Пуля: b(t) = u*v_muzzle*t + g_vec*t^2/2, где g_vec = [0, g, 0] (Y вниз)
+
+        Ищем t, при котором |p(t) - g_vec*t^2/2| = v_muzzle * t
+        (итерация неподвижной точки, не больше max_iter шагов на кадр).
+        Если решение не сошлось или ушло за max_t, для этой цели берется
+        время полета до текущей позиции, а converged = False.
+
+        table: FiringTable — угол ствола и время полета берутся из таблицы
+        (годится для любой модели полета, в т.ч. с сопротивлением воздуха).
+        t_offset: задержка до выстрела (сек) — состояние цели сначала
+        продвигается на это время (компенсация задержки конвейера).
+
+        Возвращает массивы [N]: (t_fly, yaw, pitch, converged, aim_point[N, 3]),
+        где aim_point — точка, в которую надо направить ствол.
+        """
+        pos = np.atleast_2d(np.asarray(target_pos, dtype=float))
+        vel = np.atleast_2d(np.asarray(target_vel, dtype=float))
+        if target_acc is None:
+            acc = np.zeros_like(pos)
+        else:
+            acc = np.atleast_2d(np.asarray(target_acc, dtype=float))
+
+        if shooter_pos is not None:
+            pos = pos - np.asarray(shooter_pos, dtype=float)
+
+        if t_offset:
+            pos = pos + vel * t_offset + acc * (0.5 * t_offset ** 2)
+            vel = vel + acc * t_offset
+
+        if table is not None:
+            return BallisticsSolver._solve_intercept_table(
+                pos, vel, acc, table, max_iter, tol, max_t)
+
+        g_half = np.array([0.0, 0.5 * g, 0.0])
+
+        # Начальное приближение — время полета до текущей позиции
+        t_start = np.linalg.norm(pos, axis=1) / v_muzzle
+        t_fly = t_start
+        converged = np.zeros(len(pos), dtype=bool)
+
+        for _ in range(max_iter):
+            t2 = (t_fly ** 2)[:, None]
+            aim = pos + vel * t_fly[:, None] + acc * (0.5 * t2) - g_half * t2
+            # Ограничиваем, чтобы расходящаяся итерация не улетела в inf
+            t_new = np.minimum(np.linalg.norm(aim, axis=1) / v_muzzle, max_t)
+
+            converged = np.abs(t_new - t_fly) < tol
+            t_fly = t_new
+            if converged.all():
+                break
+
+        converged &= t_fly < max_t
+        t_fly = np.where(converged, t_fly, t_start)
+
+        t2 = (t_fly ** 2)[:, None]
+        aim = pos + vel * t_fly[:, None] + acc * (0.5 * t2) - g_half * t2
+
+        yaw, pitch = BallisticsSolver.get_aim_angles(aim)
+        return t_fly, yaw, pitch, converged, aim
+
+    @staticmethod
+    def _solve_intercept_table(pos, vel, acc, table, max_iter, tol, max_t):
+        """Та же итерация перехвата, но t_fly и угол ствола читаются из таблицы"""
+        t_start = np.linalg.norm(pos, axis=1) / table.v_muzzle
+        t_fly = t_start
+        converged = np.zeros(len(pos), dtype=bool)
+
+        for _ in range(max_iter):
+            future = pos + vel * t_fly[:, None] + acc * (0.5 * (t_fly ** 2)[:, None])
+            _, t_new, valid = table.lookup(np.hypot(future[:, 0], future[:, 2]), -future[:, 1])
+            t_new = np.where(valid, np.minimum(t_new, max_t), t_fly)
+
+            converged = valid & (np.abs(t_new - t_fly) < tol)
+            t_fly = t_new
+            if converged.all():
+                break
+
+        converged &= t_fly < max_t
+        t_fly = np.where(converged, t_fly, t_start)
+
+        future = pos + vel * t_fly[:, None] + acc * (0.5 * (t_fly ** 2)[:, None])
+        horiz = np.hypot(future[:, 0], future[:, 2])
+        pitch, _, valid = table.lookup(horiz, -future[:, 1])
+
+        yaw = np.arctan2(future[:, 0], future[:, 2])
+        # Вне таблицы — просто смотрим на упрежденную точку
+        pitch = np.where(valid, pitch, np.arctan2(-future[:, 1], horiz))
+
+        # Точка прицеливания по направлению ствола на дальности цели
+        dist = np.linalg.norm(future, axis=1)
+        aim = np.stack([
+            np.sin(yaw) * np.cos(pitch),
+            -np.sin(pitch),
+            np.cos(yaw) * np.cos(pitch),
+        ], axis=1) * dist[:, None]
+
+        return t_fly, yaw, pitch, converged, aim
+
+    @staticmethod
+    def get_firing_table(v_muzzle, g=G, drag_k=0.0):
+        """Таблица стрельбы для заданных параметров (строится/читается один раз)"""
+        key = (float(v_muzzle), float(g), float(drag_k))
+        table = BallisticsSolver._firing_tables.get(key)
+        if table is None:
+            table = FiringTable.load_or_build(v_muzzle, g, drag_k)
+            BallisticsSolver._firing_tables[key] = table
+        return table
+
+    @staticmethod
+    def get_aim_angles(aim_point):
+        """Углы турели (yaw, pitch) на точку(и) [3] или [N, 3] относительно стрелка"""
+        aim = np.atleast_2d(aim_point)
+        yaw = np.arctan2(aim[:, 0], aim[:, 2])
+        pitch = -np.arctan2(aim[:, 1], np.hypot(aim[:, 0], aim[:, 2]))
+        return yaw, pitch
 
     @staticmethod
     def calculate_drop(distance, v_muzzle):
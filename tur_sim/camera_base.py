@@ -1,5 +1,4 @@
 import numpy as np
-import pygame
 
 # --- СЛОЙ ОБОРУДОВАНИЯ (Hardware Layer) ---
 
@@ -7,6 +6,8 @@ class CameraBase:
     def __init__(self, width=640, height=480):
         self.width = width
         self.height = height
+        # Время захвата последнего кадра от железа (None — берем часы контроллера)
+        self.frame_time = None
 
     def refresh(self):
         """очистить кеш изображения"""
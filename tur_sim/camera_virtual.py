@@ -1,6 +1,5 @@
 import numpy as np
 import cv2
-import pygame
 from .camera_base import CameraBase
 from .physical_world import PhysicalWorld
 
@@ -19,6 +18,7 @@ class CameraVirtual(CameraBase):
         self.pitch = 0.0  # вертикаль
 
         self._last_frame = None
+        self.frame_time = None  # виртуальная камера: время захвата = время симуляции
 
     def refresh(self):
         """очистить кеш изображения"""
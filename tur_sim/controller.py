@@ -1,15 +1,27 @@
+import json
 import math
+import os
+
 import numpy as np
 
-from .ballistics_corrector import BallisticsCorrector
 from .ballistics_logger import BallisticsLogger
 from .ballistics_solver import BallisticsSolver
 from .camera_virtual import CameraVirtual
+from .fire_readiness import FireReadiness
+from .fused_corrector import FusedCorrector
+from .hit_probability import HitProbabilityEstimator
 from .image_analizer import ImageAnalyzer
 from .kalman_predictor import KalmanPredictor
+from .latency_monitor import LatencyMonitor
+from .online_learner import OnlineLearner
 from .motion_base import MotionCircular, MotionPointToPoint, MotionSpline
 from .physical_object import PhysicalObject
 from .physical_world import PhysicalWorld
+from .projectile_model import ProjectileModel
+from .rls_corrector import RLSCorrector
+from .sim_clock import SimClock
+from .stage_profiler import StageProfiler
+from .trace_recorder import TraceRecorder
 from .tracked_target import TrackedTarget
 from .turret_model import TurretModel
 
@@ -18,6 +30,11 @@ class Controller:
 
     TARGET_RADIUS = 0.5 #радиус цели
 
+    # Камера: разрешение и фокусное расстояние в пикселях
+    CAMERA_WIDTH = 640
+    CAMERA_HEIGHT = 480
+    CAMERA_F = 500
+
     # Состояния автомата
     STATE_MANUAL = "MANUAL"  # ручная работа
     STATE_SEARCHING = "SEARCHING"  # Цели нет, смотрим в центр
@@ -25,26 +42,109 @@ class Controller:
     STATE_WAIT_CPA = "WAIT_CPA"  # Пуля в воздухе, ждем момента сближения
 
     LOGGING_SHOTS = False # пишеи ли инфу для нейромети в файл
-    LOGGING_FILE = 'dataset_02.csv'
+    LOGGING_FILE = 'dataset_02.shots' # *.shots — бинарный колоночный журнал, *.csv — текст
 
     AUTO_SHOTTING = False # выполняем ли автоматическую стрельбу
 
     USE_AI = False # исаоользуем нейросеть
+    AI_FUSED = True # нейросеть на чистом NumPy (export_corrector.py), если веса экспортированы
+    # "net" — BallisticsNet, "rls" — полиномиальный RLS (без torch, учится после каждого выстрела)
+    AI_BACKEND = "net"
+    # дообучение на лету в отдельном процессе (нужен USE_AI), веса подменяются без перезапуска
+    USE_ONLINE_LEARNING = False
 
     USE_SERIES = False # использовать серийнцю стрельбу
 
-    def __init__(self):
+    # углы и время полета из таблицы стрельбы (строится при старте). Без сопротивления
+    # воздуха таблица дает то же, что аналитика, но в несколько раз медленнее
+    # (поиск по таблице на каждой итерации упреждения), поэтому по умолчанию выключена
+    USE_FIRING_TABLE = False
+
+    # снаряд с сопротивлением воздуха (RK4). Аналитика считает параболу в вакууме,
+    # поэтому с USE_DRAG прицеливание всегда идет по таблице, построенной по той же модели
+    USE_DRAG = False
+    BULLET_DRAG_COEF = 0.47 # Cd шара
+    BULLET_MASS = 0.05 # кг
+    BULLET_CALIBER_RADIUS = 0.01 # м (физический, не визуальный радиус)
+
+    # Параметры Калмана, экспортированные tune_kalman.py (если файл есть)
+    KALMAN_PARAMS_FILE = "data/kalman_params.json"
+
+    USE_HIT_PROB = False # автоматический выстрел только при достаточной вероятности попадания
+    # Порог P(hit) для выстрела. Ковариация Калмана с текущими Q довольно
+    # пессимистична, поэтому абсолютные значения P(hit) занижены
+    FIRE_HIT_PROB_THRESHOLD = 0.1
+
+    # стрелять по готовности (сходимость фильтра + успокоение турели), а не по таймеру.
+    # Выключено: выстрелов больше и по быстрым целям точнее, но по медленным
+    # доля попаданий ниже (bench_accuracy.py: static 97.8% -> 77.5%)
+    USE_READINESS = False
+
+    LATENCY_COMPENSATION = True # добавлять измеренную задержку конвейера к горизонту прогноза
+    # + время выхода турели на угол. При стрельбе по готовности турель уже на месте,
+    # поэтому по умолчанию не добавляем (иначе упреждение с перебором)
+    LATENCY_INCLUDE_ARRIVAL = False
+
+    # Турель следит с упреждением по угловой скорости цели (feed-forward + P),
+    # иначе — догоняет угол, уполовинивая ошибку каждый кадр.
+    # Выключено: по bench_accuracy.py точность с ним ниже (p2p_fast 84.4% -> 62.2%)
+    TURRET_FEEDFORWARD = False
+    TURRET_MAX_ACCEL = None # рад/с^2, ограничение ускорения приводов (None — нет)
+
+    # Тайминги автомата в секундах (не зависят от частоты кадров)
+    FIRE_WAIT_TIME = 0.8  # пауза после захвата / выстрела (~50 кадров на 60 Гц)
+    SERIES_WAIT_TIME = 0.033  # пауза перед быстрым дострелом (~2 кадра)
+    LOST_TARGET_TIMEOUT = 0.17  # сколько цель может пропадать до сброса захвата
+
+    # Частоты цикла в UI (LoopScheduler): физика — фиксированным шагом с подшагами,
+    # камера, анализ и управление — с частотой кадров камеры
+    PHYSICS_HZ = 240
+    VISION_HZ = 60
+
+    # Замеры времени стадий кадра (p50/p95/p99 в телеметрии, F9 — сохранить в data/)
+    PROFILING = False
+    # Таймлайн стадий и событий (Chrome trace-event) в кольцевом буфере,
+    # F10 — сохранить последние TRACE_DUMP_SEC секунд в data/trace/
+    TRACING = False
+    TRACE_DUMP_SEC = 10.0
+
+    def __init__(self, clock=None):
+        # Единые часы для трекера, фильтров и логгера.
+        # По умолчанию модельное время, которое двигается шагом dt из update()
+        self.clock = clock if clock is not None else SimClock()
+
         self.world = PhysicalWorld()
 
         self._init_world() # _v01 _v02
 
         # Инициализируем виртуальную камеру, передав ей мир
-        self.camera : CameraVirtual = CameraVirtual(self.world, width=640, height=480, f=500)
+        self.camera : CameraVirtual = CameraVirtual(
+            self.world, width=self.CAMERA_WIDTH, height=self.CAMERA_HEIGHT, f=self.CAMERA_F)
 
         # Создаем турель и отдаем ей камеру и мир
         self.turret = TurretModel(self.camera, self.world)
+        self.turret.use_feedforward = self.TURRET_FEEDFORWARD
+        self.turret.max_turn_accel = self.TURRET_MAX_ACCEL
+
+        if self.USE_DRAG:
+            self.turret.projectile_model = ProjectileModel.from_physical(
+                BallisticsSolver.G, self.BULLET_DRAG_COEF,
+                self.BULLET_MASS, self.BULLET_CALIBER_RADIUS
+            )
+        drag_k = self.turret.projectile_model.drag_k if self.USE_DRAG else 0.0
 
-        self.analyzer = ImageAnalyzer(640, 480)
+        if self.USE_DRAG and self.USE_HIT_PROB:
+            # оценка P(hit) считает полет в вакууме — с сопротивлением она врет
+            raise ValueError("USE_HIT_PROB не поддерживает USE_DRAG")
+
+        # Таблица стрельбы под текущую скорость снаряда (или кеш с диска)
+        self.firing_table = None
+        if self.USE_FIRING_TABLE or self.USE_DRAG:
+            self.firing_table = BallisticsSolver.get_firing_table(
+                self.turret.projectile_speed, BallisticsSolver.G, drag_k
+            )
+
+        self.analyzer = ImageAnalyzer(self.CAMERA_WIDTH, self.CAMERA_HEIGHT)
         self.current_detections = []
 
         self.locked_target_data = None  # Здесь храним данные о детекции (экранные)
@@ -57,10 +157,28 @@ class Controller:
         self.hits_count = 0
         self.chits_count = 0
 
-        self.fire_wait_ticks = 50
-        self.fire_wait_cnt = 0
+        self.fire_wait_timer = 0.0  # сколько еще ждать до выстрела (сек)
+
+        self.lost_targ_time = 0.0  # сколько цель уже не видна (сек)
 
-        self.lost_targ_cnt = 0
+        # Монте-Карло оценка попадания перед автоматическим выстрелом
+        self.hit_estimator = HitProbabilityEstimator() if self.USE_HIT_PROB else None
+        self.last_hit_prob = None
+
+        # Готовность к выстрелу и метрика "от захвата до первого выстрела"
+        self.readiness = FireReadiness() if self.USE_READINESS else None
+        self.lock_time = None  # время захвата, пока первый выстрел не сделан
+        self.last_time_to_first_shot = None
+        self.time_to_first_shot_sum = 0.0
+        self.time_to_first_shot_cnt = 0
+
+        # Метки времени кадра по стадиям конвейера и статистика задержек
+        self.latency = LatencyMonitor()
+        self.frame_stamps = LatencyMonitor.begin_frame(self.clock.now())
+
+        # Время выполнения стадий (физика, камера, анализ, трекинг, UI) и таймлайн
+        self.tracer = TraceRecorder() if self.TRACING else None
+        self.profiler = StageProfiler(self.PROFILING, tracer=self.tracer)
 
         if self.AUTO_SHOTTING:
             self.state = self.STATE_SEARCHING
@@ -68,10 +186,25 @@ class Controller:
             self.state = self.STATE_MANUAL
 
         if self.LOGGING_SHOTS:
-            self.logger = BallisticsLogger(self.LOGGING_FILE)
-
-        if self.USE_AI:
-            self.corrector = BallisticsCorrector()
+            self.logger = BallisticsLogger(self.LOGGING_FILE, self.clock)
+
+        self.ai_correction = (0.0, 0.0)  # последняя примененная поправка сети
+        self.learner = None
+        if self.USE_AI and self.AI_BACKEND == "rls":
+            self.corrector = RLSCorrector()
+        elif self.USE_AI and self.USE_ONLINE_LEARNING:
+            # Корректор на NumPy; до первой версии от ученика — стартовые веса или ноль
+            path = FusedCorrector.MODEL_PATH if os.path.exists(FusedCorrector.MODEL_PATH) else None
+            self.corrector = FusedCorrector(path)
+            # Ученик стартует с тех же весов, что стоят в корректоре
+            self.learner = OnlineLearner(self.corrector.get_weights() if self.corrector.is_ready else None)
+        elif self.USE_AI:
+            if self.AI_FUSED and os.path.exists(FusedCorrector.MODEL_PATH):
+                self.corrector = FusedCorrector()
+            else:
+                # torch и sklearn грузим только здесь — без нейросети они не нужны
+                from .ballistics_corrector import BallisticsCorrector
+                self.corrector = BallisticsCorrector()
 
         # --- НОВОЕ ДЛЯ ОБРАТНОЙ СВЯЗИ ---
         self.feedback_offset_yaw = 0.0
@@ -84,12 +217,36 @@ class Controller:
             'q_acc' : KalmanPredictor.DEF_Q_ACC,
             'r_noise' : KalmanPredictor.DEF_R_NOISE,
         }
+        self._load_kalman_params()
+
+    def close(self):
+        """Завершение работы: дописываем журнал выстрелов, останавливаем ученика, сохраняем RLS"""
+        if self.learner is not None:
+            self.learner.close()
+        if self.USE_AI and self.AI_BACKEND == "rls":
+            self.corrector.save()
+        if self.LOGGING_SHOTS:
+            self.logger.close()
+            stats = self.logger.stats()
+            print(f"Журнал выстрелов: записано {stats['written']}, потеряно {stats['dropped']}")
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, value):
+        # Смена состояния автомата — метка на таймлайне
+        if self.tracer is not None and value != getattr(self, "_state", None):
+            self.tracer.instant(f"state.{value}", {"t_sim": self.clock.now()})
+        self._state = value
 
     def set_auto_mode(self, tutn_on):
         if tutn_on:
             self.state = self.STATE_SEARCHING
         else:
             self.state = self.STATE_MANUAL
+            self.lock_time = None  # в ручном режиме первого автоматического выстрела не будет
 
 
     def get_kalman_param(self,key):
@@ -99,6 +256,20 @@ class Controller:
         self.kalman_params[key] = value
         self.assign_kalman_params()
 
+    def _load_kalman_params(self):
+        """подхватить подобранные параметры Калмана как значения по умолчанию"""
+        if not os.path.exists(self.KALMAN_PARAMS_FILE):
+            return
+        try:
+            with open(self.KALMAN_PARAMS_FILE) as f:
+                params = json.load(f)
+            for key in self.kalman_params:
+                if key in params:
+                    self.kalman_params[key] = float(params[key])
+            print(f"Kalman: параметры загружены из {self.KALMAN_PARAMS_FILE}")
+        except Exception as e:
+            print(f"Kalman: не удалось прочитать {self.KALMAN_PARAMS_FILE}. {e}")
+
     def assign_kalman_params(self):
         """применить настройки к фиотиру кальмана активного трека"""
         if self.active_track is not None:
@@ -176,18 +347,61 @@ class Controller:
 
 
     def update(self, dt):
-        # 1. Обновляем мир и турель и кеш камеры
+        """Шаг физики и кадр камеры с одним dt (headless-прогоны, бенчмарки)"""
+        self.step_physics(dt)
+        self.step_vision(dt)
+
+    def step_physics(self, dt):
+        """
+        Шаг физики (LoopScheduler вызывает его с фиксированным dt чаще, чем кадры):
+        часы, мир, приводы турели и сближение летящей пули с целью
+        """
+        prof = self.profiler
+        t_step = prof.start()
+
+        # 0. Двигаем часы симуляции (для реальных часов ничего не происходит)
+        self.clock.advance(dt)
+
+        # 1. Обновляем мир и турель
+        t0 = prof.start()
         self.world.update(dt)
+        prof.stop("world", t0)
 
         self.turret.update(dt)
+        self.latency.on_turret(self.clock.now(), self.turret.yaw, self.turret.pitch)
+
+        if self.active_shot is not None:
+            self._track_cpa(self.active_shot)
+
+        prof.stop("physics", t_step)
+
+    def step_vision(self, dt):
+        """
+        Кадр камеры: анализ картинки, трекинг и автомат стрельбы.
+        dt — время с прошлого кадра (частота камеры, а не физики)
+        """
+        prof = self.profiler
+        t_step = prof.start()
+
+        if self.learner is not None:
+            self.learner.poll(self.corrector)
 
         self.camera.refresh()
 
         # 2. Получаем "картинку" с камеры
+        t0 = prof.start()
         frame = self.camera.get_frame()
+        prof.stop("camera", t0)
+        capture_time = self.camera.frame_time
+        if capture_time is None:
+            capture_time = self.clock.now()
+        self.frame_stamps = LatencyMonitor.begin_frame(capture_time)
 
         # 3. АНАЛИЗИРУЕМ пиксели (теперь это наш основной источник данных для ИИ)
+        t0 = prof.start()
         self.current_detections = self.analyzer.analyze(frame)
+        prof.stop("analyzer", t0)
+        LatencyMonitor.mark(self.frame_stamps, "analysis", self.clock.now())
 
         for det in self.current_detections:
             if det["type"] == "target":
@@ -195,7 +409,10 @@ class Controller:
                     det["screen_r"], self.TARGET_RADIUS, self.camera.f
                 )
 
-        self._update_target_lock()
+        self._update_target_lock(dt)
+
+        if self.readiness is not None and self.active_track is not None:
+            self.readiness.update(dt, self.turret, self.active_track.kalman)
 
         # Логика конечного автомата
         if self.state == self.STATE_SEARCHING:
@@ -207,6 +424,8 @@ class Controller:
         elif self.state == self.STATE_WAIT_CPA:
             self._state_wait_cpa()
 
+        prof.stop("vision", t_step)
+
         # Для отладки можно выводить количество найденных объектов
         # if self.current_detections:
         #    print(f"Detected: {len(self.current_detections)} objects")
@@ -225,7 +444,7 @@ class Controller:
             self.handle_target_lock(targets[0])
             self.state = self.STATE_TRACKING
             # взводим тамер
-            self.fire_wait_cnt = self.fire_wait_ticks
+            self.fire_wait_timer = self.FIRE_WAIT_TIME
             print("Цель найлена! Ативируем.")
         else:
              # Возвращаем турель в нейтраль
@@ -243,11 +462,21 @@ class Controller:
             print("Выстрел не закончен! Ждем резкльтат.")
             return
 
-        if self.fire_wait_cnt > 0:
+        if self.readiness is not None:
+            # ждем, пока фильтр сойдется и турель успокоится
+            if not self.readiness.is_ready:
+                return
+        elif self.fire_wait_timer > 0:
             # ждем
-            self.fire_wait_cnt -= 1
-        elif not self.turret.limited_turn:
-            # стреляем
+            self.fire_wait_timer -= dt
+            return
+
+        if not self.turret.limited_turn:
+            # стреляем, если шанс попасть достаточный
+            if self.hit_estimator is not None:
+                self.last_hit_prob = self.estimate_hit_probability()
+                if self.last_hit_prob < self.FIRE_HIT_PROB_THRESHOLD:
+                    return
             self._perform_automated_shot()
 
     def _perform_automated_shot(self):
@@ -261,12 +490,23 @@ class Controller:
                 "bullet": bullet,
                 "state": state,
                 "min_dist": float('inf'),
+                "passed": False,  # пуля прошла CPA, ждем разбора в кадре
                 "required_delta": None,
+                "ai_correction": self.ai_correction,  # поправка сети, с которой стреляли
                 "target_pos_at_shot": self.active_track.position.copy()
             }
             self.state = self.STATE_WAIT_CPA
             print("Выстрел.")
             self.shots_count += 1
+            if self.tracer is not None:
+                self.tracer.instant("fire", {"t_sim": self.clock.now(), "shot": self.shots_count})
+
+            if self.lock_time is not None:
+                # Первый выстрел после захвата — фиксируем задержку
+                self.last_time_to_first_shot = self.clock.now() - self.lock_time
+                self.time_to_first_shot_sum += self.last_time_to_first_shot
+                self.time_to_first_shot_cnt += 1
+                self.lock_time = None
         else:
             self.active_shot = None
 
@@ -279,6 +519,29 @@ class Controller:
             return
 
         shot = self.active_shot
+
+        # Сближение считается в step_physics на каждом шаге физики
+        if shot["passed"]:
+            # Расстояние начало расти — пуля пролетела мимо цели
+            self._finalize_shot(shot)
+            self.active_shot = None
+
+            # Если цель всё еще на экране, продолжаем трекинг, иначе в поиск
+            if self.is_locked:
+                self.state = self.STATE_TRACKING
+                # взводим тамер
+                self.fire_wait_timer = self.FIRE_WAIT_TIME
+                print("Готовим следующий выстрел.")
+            else:
+                self.state =self.STATE_SEARCHING
+                print("Ищем цель.")
+
+
+    def _track_cpa(self, shot):
+        """Ищем точку минимального сближения (CPA) пули с целью"""
+        if shot["passed"]:
+            return
+
         bullet = shot["bullet"]
         target = self.target_obj
 
@@ -287,7 +550,6 @@ class Controller:
         rel_pos = bullet.pos - target.pos
         current_dist = np.linalg.norm(rel_pos)
 
-        # Ищем точку минимального сближения (CPA)
         if current_dist < shot["min_dist"] and not bullet.is_dead:
             shot["min_dist"] = current_dist
 
@@ -302,25 +564,15 @@ class Controller:
 
             shot["required_delta"] =(delta_yaw, delta_pitch)
         else:
-            # Расстояние начало расти — пуля пролетела мимо цели
-            self._finalize_shot(shot)
-            self.active_shot = None
-
-            # Если цель всё еще на экране, продолжаем трекинг, иначе в поиск
-            if self.is_locked:
-                self.state = self.STATE_TRACKING
-                # взводим тамер
-                self.fire_wait_cnt = self.fire_wait_ticks
-                print("Готовим следующий выстрел.")
-            else:
-                self.state =self.STATE_SEARCHING
-                print("Ищем цель.")
-
+            shot["passed"] = True
 
     def _finalize_shot(self, shot):
         """Вызывается, когда пуля прошла точку CPA"""
         #Логгер берет на себя всю грязную работу по записи
         is_hit = shot["min_dist"] < self.TARGET_RADIUS + self.turret.BULLET_RADIUS
+        if self.tracer is not None:
+            self.tracer.instant("hit" if is_hit else "miss",
+                                {"t_sim": self.clock.now(), "min_dist": float(shot["min_dist"])})
 
         if self.LOGGING_SHOTS:
             self.logger.log_shot(
@@ -329,7 +581,16 @@ class Controller:
                 is_hit
             )
 
-        self.shots_count += 1
+        if self.USE_AI and shot["required_delta"] is not None:
+            # Для обучения нужна полная поправка: уже примененная + оставшийся промах
+            applied = shot["ai_correction"]
+            delta = shot["required_delta"]
+            total = (applied[0] + delta[0], applied[1] + delta[1])
+            if self.learner is not None:
+                self.learner.submit(shot["state"], total)
+            elif self.AI_BACKEND == "rls":
+                self.corrector.update(shot["state"], total)
+
         if is_hit:
             self.hits_count  += 1
             # Попали! Сбрасываем серию коррекций и офсеты
@@ -354,7 +615,7 @@ class Controller:
                 self.correction_series_cnt += 1
 
                 # Магия: обнуляем таймер ожидания, чтобы выстрелить СРАЗУ
-                self.fire_wait_cnt = 2  # минимальная пауза на успокоение приводов
+                self.fire_wait_timer = self.SERIES_WAIT_TIME  # минимальная пауза на успокоение приводов
                 print(f"Промах! Попытка коррекции {self.correction_series_cnt}/{self.MAX_CORRECTION_ATTEMPTS}")
             else:
                 # Попытки кончились, сбрасываемся на чистую баллистику
@@ -364,6 +625,24 @@ class Controller:
         # print(f"--- SHOT REPORT ---")
         # print(f"Total: {self.shots_count} | Hits: {self.hits_count} ({self.hits_count / self.shots_count:.1%})")
 
+    def estimate_hit_probability(self):
+        """P(hit) выстрела прямо сейчас по текущему стволу и состоянию трека"""
+        if self.active_track is None:
+            return 0.0
+
+        if self.USE_DRAG:
+            raise ValueError("оценка P(hit) не поддерживает USE_DRAG")
+        if self.hit_estimator is None:
+            self.hit_estimator = HitProbabilityEstimator()
+
+        kalman = self.active_track.kalman
+        return self.hit_estimator.estimate(
+            kalman.X, kalman.P,
+            self.turret.yaw, self.turret.pitch,
+            self.turret.projectile_speed, BallisticsSolver.G,
+            self.TARGET_RADIUS + self.turret.BULLET_RADIUS
+        )
+
     def get_nn_state(self):
         """Упаковка данных для нейросети (State)."""
         if not self.active_track:
@@ -389,7 +668,8 @@ class Controller:
         ], dtype=float)
 
     def fire(self):
-        self.turret.fire()
+        if self.turret.fire() and self.tracer is not None:
+            self.tracer.instant("fire", {"t_sim": self.clock.now(), "manual": True})
 
     def set_target_by_pixel(self, x, y):
         """Первичный захват по клику мыши"""
@@ -413,6 +693,8 @@ class Controller:
         self.is_locked = False
         self.active_track = None
         self.series_stop()
+        # Угол оставляем, но скорость цели больше не упреждаем
+        self.turret.set_target_angles(self.turret.target_yaw, self.turret.target_pitch)
 
     def move_turret_to_pixel(self, x, y):
         """Сброс захвата и ручной поворот в точку"""
@@ -437,20 +719,27 @@ class Controller:
                 detection["pos"][0],
                 detection["pos"][1],
                 dist,
-                self.camera
+                self.camera,
+                self.clock
             )
             self.assign_kalman_params()
+            if self.state != self.STATE_MANUAL:
+                # метрика только для автоматической стрельбы: ручной выстрел lock_time не сбрасывает
+                self.lock_time = self.clock.now()
         else:
             # Обновляем существующий
             # Передаем сырые данные в трек для стабилизации
+            t0 = self.profiler.start()
             self.active_track.update_with_screen_data(
                 detection["pos"][0],
                 detection["pos"][1],
                 dist,
-                self.camera
+                self.camera,
+                self.frame_stamps["capture"]
             )
+            self.profiler.stop("track", t0)
 
-    def _update_target_lock(self):
+    def _update_target_lock(self, dt):
         """цдержание цели и донавотка турели с учктом упреждения"""
         if self.is_locked and self.locked_target_data:
             new_lock = None
@@ -468,47 +757,72 @@ class Controller:
             if new_lock:
                 # Цель найдена, обновляем данные
                 self.handle_target_lock(new_lock)
+                LatencyMonitor.mark(self.frame_stamps, "track", self.clock.now())
 
                 # наводимся с учетом дистанции
                 self._turret_to_target()
-                self.lost_targ_cnt = 0
+                self.lost_targ_time = 0.0
 
             else:
-                self.lost_targ_cnt += 1
-                if self.lost_targ_cnt > 10:
+                self.lost_targ_time += dt
+                if self.lost_targ_time > self.LOST_TARGET_TIMEOUT:
                     # Цель потеряна (ушла за экран или скрылась)
                     self.clear_target()
-                    self.lost_targ_cnt = 0
+                    self.lost_targ_time = 0.0
 
     def _turret_to_target(self):
         if not self.active_track: return
 
         """наводимся на ту цель"""
         # Наводим турель на обновленные координаты
+        # (с учетом задержки от захвата кадра до команды / выхода турели на угол)
+        latency = 0.0
+        if self.LATENCY_COMPENSATION:
+            if self.LATENCY_INCLUDE_ARRIVAL:
+                latency = self.latency.total_latency()
+            else:
+                latency = self.latency.pipeline_latency()
+        t0 = self.profiler.start()
         target_yaw, target_pitch = self.active_track.get_fire_angles(
             np.array([0, 0, 0]),
             self.turret.projectile_speed,
-            BallisticsSolver.G
+            BallisticsSolver.G,
+            self.firing_table,
+            latency
         )
+        self.profiler.stop("fire_solution", t0)
 
         if self.USE_AI:
             # 2. Получаем текущее состояние для сети
             state = self.get_nn_state()  # Возвращает [err_yaw, err_pitch, v_yaw, v_pitch, dist, t_pitch]
 
             # 3. Запрашиваем поправку
+            t0 = self.profiler.start()
             d_yaw, d_pitch = self.corrector.get_correction(*state)
+            self.profiler.stop("corrector", t0)
 
             # print(f"Target angles: Math({target_yaw:.3f}) | AI({d_yaw:.4f})")
             # print(f"Inputs: Dist: {state[4]:.1f} | V_yaw: {state[2]:.4f}")
 
-            target_yaw -= d_yaw
+            # Поправка в тех же углах, что и промах required_delta, — углы камеры:
+            # yaw камеры совпадает с турелью, pitch камеры направлен вниз (турели — вверх)
+            target_yaw += d_yaw
             target_pitch -= d_pitch
+            self.ai_correction = (d_yaw, d_pitch)
 
         #  Поправка от "быстрого дострела" (Feedback Loop)
+        # Офсеты копятся из required_delta — применяем по тому же правилу, что и поправку сети
         target_yaw += self.feedback_offset_yaw
-        target_pitch += self.feedback_offset_pitch
+        target_pitch -= self.feedback_offset_pitch
+
+        yaw_rate, pitch_rate = 0.0, 0.0
+        if self.turret.use_feedforward:
+            yaw_rate, pitch_rate = self.active_track.get_angle_rates()
 
-        self.turret.set_target_angles(target_yaw, target_pitch)
+        self.turret.set_target_angles(target_yaw, target_pitch, yaw_rate, pitch_rate)
+
+        LatencyMonitor.mark(self.frame_stamps, "command", self.clock.now())
+        self.latency.on_command(self.frame_stamps, self.turret.target_yaw, self.turret.target_pitch)
 
 
     def is_active_target(self,det_target):
@@ -518,6 +832,12 @@ class Controller:
         else:
             return False
 
+    def get_mean_time_to_first_shot(self):
+        """Среднее время от захвата до первого выстрела (сек)"""
+        if self.time_to_first_shot_cnt == 0:
+            return 0.0
+        return self.time_to_first_shot_sum / self.time_to_first_shot_cnt
+
     def get_locked_distance(self):
         if self.is_locked:
             return self.locked_target_data["distance"]
@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+
+from .tracked_target import ema_alpha
+
+
+class FireReadiness:
+    """
+    Детектор готовности к выстрелу вместо фиксированной паузы после захвата.
+    Готово, когда одновременно:
+      - турель успокоилась: остаток (target - current) и скорость его изменения малы
+      - фильтр Калмана сошелся: мала неопределенность позиции (след P)
+      - измерения согласуются с прогнозом: сглаженный NIS ниже порога
+    """
+
+    DEF_MAX_AIM_ERR = math.radians(0.3)  # рад, остаток наведения
+    DEF_MAX_AIM_RATE = math.radians(5.0)  # рад/с, скорость изменения остатка
+    DEF_MAX_POS_STD = 0.35  # м, sqrt(trace(P_pos) / 3)
+    DEF_MAX_NIS = 7.8  # ~95% квантиль хи-квадрат с 3 степенями свободы
+    MIN_UPDATES = 5  # минимум обновлений фильтра после захвата
+    RATE_TAU = 0.05  # сек, сглаживание скорости остатка
+    NIS_TAU = 0.2  # сек, сглаживание NIS
+
+    def __init__(self,
+                 max_aim_err=DEF_MAX_AIM_ERR,
+                 max_aim_rate=DEF_MAX_AIM_RATE,
+                 max_pos_std=DEF_MAX_POS_STD,
+                 max_nis=DEF_MAX_NIS):
+        self.max_aim_err = max_aim_err
+        self.max_aim_rate = max_aim_rate
+        self.max_pos_std = max_pos_std
+        self.max_nis = max_nis
+        self.reset()
+
+    def reset(self):
+        """Сброс при новом захвате"""
+        self._kalman = None
+        self._innovation = None
+        self.updates = 0
+
+        self.aim_err = float("inf")
+        self.aim_rate = float("inf")
+        self.pos_std = float("inf")
+        self.nis = 0.0
+        self._last_err = None
+
+        self.is_ready = False
+
+    def update(self, dt, turret, kalman):
+        """Вызывать каждый кадр трекинга. Возвращает готовность к выстрелу"""
+        if kalman is not self._kalman:
+            self.reset()
+            self._kalman = kalman
+
+        # 1. Остаток наведения турели и его скорость
+        d_yaw = turret.norm_angle(turret.target_yaw - turret.yaw)
+        d_pitch = turret.target_pitch - turret.pitch
+        self.aim_err = math.hypot(d_yaw, d_pitch)
+
+        if self._last_err is not None and dt > 0:
+            inst_rate = abs(self.aim_err - self._last_err) / dt
+            if math.isinf(self.aim_rate):
+                self.aim_rate = inst_rate
+            else:
+                alpha = ema_alpha(dt, self.RATE_TAU)
+                self.aim_rate = self.aim_rate * (1 - alpha) + inst_rate * alpha
+        self._last_err = self.aim_err
+
+        # 2. Сходимость фильтра (только на кадрах с новым измерением)
+        if kalman.last_innovation is not self._innovation:
+            self._innovation = kalman.last_innovation
+            self.updates += 1
+            alpha = ema_alpha(dt, self.NIS_TAU) if dt > 0 else 1.0
+            self.nis = self.nis * (1 - alpha) + kalman.last_nis * alpha
+
+        self.pos_std = math.sqrt(max(np.trace(kalman.P[0:3, 0:3]), 0.0) / 3.0)
+
+        self.is_ready = (
+            self.updates >= self.MIN_UPDATES
+            and self.aim_err < self.max_aim_err
+            and self.aim_rate < self.max_aim_rate
+            and self.pos_std < self.max_pos_std
+            and self.nis < self.max_nis
+        )
+        return self.is_ready
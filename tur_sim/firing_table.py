@@ -0,0 +1,249 @@
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from .projectile_model import ProjectileModel
+
+
+class FiringTable:
+    """
+    Таблица стрельбы: (горизонтальная дальность, высота цели) -> (угол ствола, время полета).
+    Строится один раз (или читается из кеша) и дальше дает O(1) чтение
+    с билинейной интерполяцией вместо тригонометрии и итераций на каждом кадре.
+
+    Высота считается ВВЕРХ от ствола (в мире Y растет вниз, т.е. height = -y).
+    Берется настильная (нижняя) ветвь траекторий.
+    """
+
+    CACHE_DIR = "data"
+
+    # Сетка таблицы
+    MAX_RANGE = 60.0
+    RANGE_STEP = 0.5
+    MAX_HEIGHT = 20.0
+    HEIGHT_STEP = 0.5
+
+    # Перебор углов ствола при построении
+    MIN_PITCH = -60.0  # градусы
+    MAX_PITCH = 60.0
+    PITCH_STEPS = 1201
+
+    # Численное интегрирование для модели с сопротивлением воздуха (RK4)
+    SIM_DT = 0.005
+    SIM_MAX_T = 3.0
+
+    def __init__(self, v_muzzle, g, drag_k=0.0):
+        """
+        v_muzzle: начальная скорость пули (м/с)
+        g: ускорение свободного падения
+        drag_k: коэффициент квадратичного сопротивления (1/м), 0 — только гравитация
+        """
+        self.v_muzzle = float(v_muzzle)
+        self.g = float(g)
+        self.drag_k = float(drag_k)
+
+        self.ranges = np.arange(self.RANGE_STEP, self.MAX_RANGE + 1e-9, self.RANGE_STEP)
+        self.heights = np.arange(-self.MAX_HEIGHT, self.MAX_HEIGHT + 1e-9, self.HEIGHT_STEP)
+
+        # [n_range, n_height], NaN — точка недостижима
+        self.pitch = None
+        self.t_fly = None
+
+    # --- построение ---
+
+    def build(self):
+        pitches = np.radians(np.linspace(self.MIN_PITCH, self.MAX_PITCH, self.PITCH_STEPS))
+
+        if self.drag_k > 0:
+            h, t = self._trajectories_drag(pitches)
+        else:
+            h, t = self._trajectories_vacuum(pitches)
+
+        # h, t: [n_pitch, n_range] — высота и время прохождения каждой дальности
+        n_r, n_h = len(self.ranges), len(self.heights)
+        self.pitch = np.full((n_r, n_h), np.nan)
+        self.t_fly = np.full((n_r, n_h), np.nan)
+
+        for i in range(n_r):
+            col_h = h[:, i]
+            col_t = t[:, i]
+            ok = np.isfinite(col_h)
+            if not ok.any():
+                continue
+
+            # Нижняя ветвь: высота растет с углом до угла максимальной высоты
+            top = np.nanargmax(np.where(ok, col_h, -np.inf))
+            branch = ok[:top + 1]
+            hb = col_h[:top + 1][branch]
+            if len(hb) < 2:
+                continue
+
+            self.pitch[i] = np.interp(self.heights, hb, pitches[:top + 1][branch],
+                                      left=np.nan, right=np.nan)
+            self.t_fly[i] = np.interp(self.heights, hb, col_t[:top + 1][branch],
+                                      left=np.nan, right=np.nan)
+        return self
+
+    def _trajectories_vacuum(self, pitches):
+        """Аналитика без сопротивления: h(R), t(R) для всех углов сразу"""
+        cos_p = np.cos(pitches)[:, None]
+        tan_p = np.tan(pitches)[:, None]
+        R = self.ranges[None, :]
+
+        t = R / (self.v_muzzle * cos_p)
+        h = R * tan_p - 0.5 * self.g * t ** 2
+        return h, t
+
+    def _trajectories_drag(self, pitches):
+        """Траектории с квадратичным сопротивлением по ProjectileModel (все углы пачкой, RK4)"""
+        n = len(pitches)
+        model = ProjectileModel(self.g, self.drag_k)
+
+        # Стреляем в плоскости Y-Z: Z — дальность, Y вниз (как в мире)
+        pos = np.zeros((n, 3))
+        vel = np.stack([
+            np.zeros(n),
+            -self.v_muzzle * np.sin(pitches),
+            self.v_muzzle * np.cos(pitches),
+        ], axis=1)
+
+        h = np.full((n, len(self.ranges)), np.nan)
+        t = np.full((n, len(self.ranges)), np.nan)
+        next_idx = np.zeros(n, dtype=int)
+
+        dt = self.SIM_DT
+        time_now = 0.0
+        while time_now < self.SIM_MAX_T:
+            new_pos, new_vel = model.step(pos, vel, dt)
+            x, y = pos[:, 2], -pos[:, 1]
+            x_new, y_new = new_pos[:, 2], -new_pos[:, 1]
+
+            # Записываем пересечения узлов дальности (линейно внутри шага)
+            for _ in range(4):
+                idx = np.minimum(next_idx, len(self.ranges) - 1)
+                r_node = self.ranges[idx]
+                cross = (next_idx < len(self.ranges)) & (x_new >= r_node)
+                if not cross.any():
+                    break
+                k = (r_node - x) / np.maximum(x_new - x, 1e-12)
+                rows = np.nonzero(cross)[0]
+                h[rows, idx[rows]] = (y + (y_new - y) * k)[rows]
+                t[rows, idx[rows]] = (time_now + dt * k)[rows]
+                next_idx[rows] += 1
+
+            pos, vel = new_pos, new_vel
+            time_now += dt
+
+            if (next_idx >= len(self.ranges)).all():
+                break
+
+        return h, t
+
+    # --- чтение ---
+
+    def lookup(self, ranges, heights):
+        """
+        Билинейная интерполяция по таблице (векторизовано).
+        Возвращает (pitch, t_fly, valid); для недостижимых точек valid = False.
+        """
+        flat, n_r, n_h = self._flat()
+
+        fr = (np.asarray(ranges, dtype=float) - self.ranges[0]) * (1.0 / self.RANGE_STEP)
+        fh = (np.asarray(heights, dtype=float) - self.heights[0]) * (1.0 / self.HEIGHT_STEP)
+
+        inside = (fr >= 0) & (fr <= n_r - 1) & (fh >= 0) & (fh <= n_h - 1)
+
+        # Индекс левого нижнего угла ячейки (в пределах таблицы)
+        i0 = np.minimum(np.maximum(fr, 0), n_r - 1.001).astype(int)
+        j0 = np.minimum(np.maximum(fh, 0), n_h - 1.001).astype(int)
+        wr = fr - i0
+        wh = fh - j0
+
+        # Одна выборка 4 углов ячейки сразу для угла и времени: [..., 4, 2]
+        corners = flat[(i0 * n_h + j0)[..., None] + self._corner_offsets]
+        weights = np.stack([(1 - wr) * (1 - wh), wr * (1 - wh), (1 - wr) * wh, wr * wh], axis=-1)
+        res = np.einsum("...k,...kc->...c", weights, corners)
+        pitch = res[..., 0]
+        t_fly = res[..., 1]
+
+        valid = inside & np.isfinite(t_fly) & np.isfinite(pitch)
+        return pitch, t_fly, valid
+
+    def _flat(self):
+        """Угол и время одним плоским массивом [n_range * n_height, 2] (для быстрого чтения)"""
+        n_r, n_h = len(self.ranges), len(self.heights)
+        flat = getattr(self, "_flat_grid", None)
+        if flat is None:
+            flat = np.stack([self.pitch, self.t_fly], axis=-1).reshape(n_r * n_h, 2)
+            self._flat_grid = flat
+            self._corner_offsets = np.array([0, n_h, 1, n_h + 1])
+        return flat, n_r, n_h
+
+    # --- кеш на диске ---
+
+    def grid_params(self):
+        """Все, от чего зависит содержимое таблицы, кроме v, g, k: сетка и перебор углов"""
+        return np.array([self.MAX_RANGE, self.RANGE_STEP, self.MAX_HEIGHT, self.HEIGHT_STEP,
+                         self.MIN_PITCH, self.MAX_PITCH, self.PITCH_STEPS, self.SIM_DT, self.SIM_MAX_T])
+
+    def cache_path(self):
+        # Сетка — в имени (хеш): таблица с другой сеткой не подхватит старый кеш
+        grid = hashlib.md5(self.grid_params().tobytes()).hexdigest()[:8]
+        name = f"firing_table_v{self.v_muzzle:g}_g{self.g:g}_k{self.drag_k:g}_{grid}.npz"
+        return os.path.join(self.CACHE_DIR, name)
+
+    def save(self, path=None):
+        """
+        Запись через временный файл и os.replace: воркеры пула, строящие одну
+        и ту же таблицу, не читают и не пишут файл наполовину
+        """
+        path = path or self.cache_path()
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix=".npz", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f,
+                         params=np.array([self.v_muzzle, self.g, self.drag_k]),
+                         grid=self.grid_params(),
+                         ranges=self.ranges, heights=self.heights,
+                         pitch=self.pitch, t_fly=self.t_fly)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        v_muzzle, g, drag_k = data["params"]
+        table = cls(v_muzzle, g, drag_k)
+        if "grid" not in data or not np.array_equal(data["grid"], table.grid_params()):
+            raise ValueError("сетка в файле не совпадает с текущими настройками")
+        if (data["pitch"].shape != (len(table.ranges), len(table.heights))
+                or data["t_fly"].shape != data["pitch"].shape):
+            raise ValueError("размер таблицы в файле не совпадает с сеткой")
+        table.pitch = data["pitch"]
+        table.t_fly = data["t_fly"]
+        return table
+
+    @classmethod
+    def load_or_build(cls, v_muzzle, g, drag_k=0.0):
+        """Берем таблицу из кеша, если параметры совпадают, иначе строим и сохраняем"""
+        table = cls(v_muzzle, g, drag_k)
+        path = table.cache_path()
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except Exception as e:
+                print(f"Firing table: кеш {path} не подходит, строим заново. {e}")
+
+        table.build()
+        try:
+            table.save(path)
+        except OSError as e:
+            print(f"Firing table: не удалось сохранить кеш {path}. {e}")
+        return table
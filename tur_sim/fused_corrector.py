@@ -0,0 +1,153 @@
+import numpy as np
+
+
+def fold_scalers(weights, biases, mean_x, scale_x, mean_y, scale_y):
+    """
+    Вшивает StandardScaler входа и выхода в первый и последний линейные слои.
+    weights — [out, in] (как в nn.Linear), результат — транспонированные под x @ W:
+      вход:  W0' = W0 / s_x,  b0' = b0 - W0' @ m_x
+      выход: Wn' = s_y * Wn,  bn' = s_y * bn + m_y
+    """
+    weights = [np.array(w, dtype=np.float64) for w in weights]
+    biases = [np.array(b, dtype=np.float64) for b in biases]
+
+    weights[0] = weights[0] / np.asarray(scale_x)[None, :]
+    biases[0] = biases[0] - weights[0] @ np.asarray(mean_x)
+
+    weights[-1] = weights[-1] * np.asarray(scale_y)[:, None]
+    biases[-1] = biases[-1] * np.asarray(scale_y) + np.asarray(mean_y)
+
+    return [np.ascontiguousarray(w.T) for w in weights], biases
+
+
+def unfold_scalers(weights, biases, mean_x, scale_x, mean_y, scale_y):
+    """
+    Обратно к fold_scalers: веса x @ W с вшитыми скалерами -> [out, in] для nn.Linear,
+    работающего в масштабированных величинах (любых, не обязательно исходных скалеров)
+    """
+    weights = [np.array(w, dtype=np.float64).T for w in weights]
+    biases = [np.array(b, dtype=np.float64) for b in biases]
+
+    biases[-1] = (biases[-1] - np.asarray(mean_y)) / np.asarray(scale_y)
+    weights[-1] = weights[-1] / np.asarray(scale_y)[:, None]
+
+    biases[0] = biases[0] + weights[0] @ np.asarray(mean_x)
+    weights[0] = weights[0] * np.asarray(scale_x)[None, :]
+
+    return [np.ascontiguousarray(w) for w in weights], biases
+
+
+class FusedCorrector:
+    """
+    Тот же BallisticsNet, но без torch и sklearn: чистый NumPy.
+    Скалеры входа и выхода вшиты в первый и последний линейные слои
+    (см. BallisticsCorrector.export_fused), буферы слоев выделены заранее.
+    Интерфейс как у BallisticsCorrector.
+    """
+
+    MODEL_PATH = "data/ballistics_model.npz"
+    LEAKY_SLOPE = 0.01  # nn.LeakyReLU по умолчанию
+    MAX_CACHED_BATCHES = 8  # сколько разных размеров пачки держим буферы
+
+    def __init__(self, path=MODEL_PATH):
+        """path=None — пустой корректор, веса придут позже через set_weights"""
+        self.is_ready = False
+        if path is None:
+            return
+        try:
+            self.load(path)
+            print("AI Corrector (NumPy): Loaded successfully")
+        except Exception as e:
+            print(f"AI Corrector Error: Could not load fused model. {e}")
+
+    def load(self, path):
+        data = np.load(path)
+        n_layers = int(data["n_layers"])
+        # Веса храним транспонированными: y = x @ W + b
+        weights = [np.ascontiguousarray(data[f"w{i}"], dtype=np.float64) for i in range(n_layers)]
+        biases = [np.ascontiguousarray(data[f"b{i}"], dtype=np.float64) for i in range(n_layers)]
+        self.set_weights(weights, biases)
+
+    @staticmethod
+    def save(path, weights, biases):
+        """Веса (уже транспонированные под x @ W) в npz для load()"""
+        arrays = {"n_layers": np.array(len(weights))}
+        for i, (w, b) in enumerate(zip(weights, biases)):
+            arrays[f"w{i}"] = w
+            arrays[f"b{i}"] = b
+        np.savez(path, **arrays)
+
+    def set_weights(self, weights, biases):
+        """Подмена весов целиком (готовый набор собирается заранее, потом одно присваивание)"""
+        layers = list(zip(weights, biases))
+        self._state = (layers, {})  # {размер пачки: буферы слоев}
+        self.is_ready = True
+
+    def get_weights(self):
+        """Текущие веса и смещения (x @ W + b, скалеры вшиты) — копии"""
+        layers, _ = self._state
+        return [w.copy() for w, _ in layers], [b.copy() for _, b in layers]
+
+    @staticmethod
+    def _make_buffers(layers, n):
+        """Вход [n, n_in] и по два буфера на каждый слой: выход и LeakyReLU"""
+        x = np.zeros((n, layers[0][0].shape[0]))
+        out = [(np.empty((n, w.shape[1])), np.empty((n, w.shape[1]))) for w, _ in layers]
+        return x, out
+
+    def _buffers(self, n):
+        layers, cache = self._state
+        buf = cache.get(n)
+        if buf is None:
+            if len(cache) >= self.MAX_CACHED_BATCHES:
+                cache.clear()
+            buf = self._make_buffers(layers, n)
+            cache[n] = buf
+        return layers, buf
+
+    def _forward(self, layers, x, out):
+        """Прямой проход по буферам; результат — в выходном буфере последнего слоя"""
+        h = x
+        last = len(layers) - 1
+        for i, (w, b) in enumerate(layers):
+            y, tmp = out[i]
+            np.dot(h, w, out=y)
+            y += b
+            if i < last:
+                np.multiply(y, self.LEAKY_SLOPE, out=tmp)
+                np.maximum(y, tmp, out=y)
+            h = y
+        return h
+
+    def get_correction_batch(self, states):
+        """
+        states [N, 6]: (err_yaw, err_pitch, v_yaw, v_pitch, dist, turret_pitch) построчно.
+        Возвращает [N, 2]: (d_yaw, d_pitch) в радианах — один проход по сети на всю пачку.
+        """
+        states = np.asarray(states, dtype=np.float64).reshape(-1, 6)
+        if not self.is_ready:
+            return np.zeros((len(states), 2))
+
+        layers, (x, out) = self._buffers(len(states))
+        x[:] = states
+        return self._forward(layers, x, out).copy()
+
+    def get_correction(self, err_yaw, err_pitch, v_yaw, v_pitch, dist, turret_pitch):
+        """
+        Принимает текущее состояние и возвращает (d_yaw, d_pitch) в радианах.
+        Пачка из одной строки, без лишних выделений памяти.
+        """
+        if not self.is_ready:
+            return 0.0, 0.0
+
+        layers, (x, out) = self._buffers(1)
+        row = x[0]
+        row[0] = err_yaw
+        row[1] = err_pitch
+        row[2] = v_yaw
+        row[3] = v_pitch
+        row[4] = dist
+        row[5] = turret_pitch
+
+        h = self._forward(layers, x, out)
+        return float(h[0, 0]), float(h[0, 1])
@@ -0,0 +1,70 @@
+import contextlib
+import io
+
+import numpy as np
+
+from .controller import Controller
+from .loop_scheduler import LoopScheduler
+from .sim_clock import SimClock
+
+
+class HeadlessRunner:
+    """
+    Прогон Controller без UI с фиксированным шагом модельного времени.
+    Используется для подбора параметров и бенчмарков (в т.ч. в пуле процессов).
+    """
+
+    def __init__(self, seed=0, dt=1 / 60, auto_mode=True, quiet=True,
+                 kalman_params=None, controller_factory=Controller, physics_hz=None):
+        """
+        dt — шаг кадра камеры. physics_hz — физика подшагами со своей частотой
+        (как в UI, через LoopScheduler); None — физика и кадр одним шагом dt
+        """
+        self.seed = seed
+        self.dt = dt
+        self.quiet = quiet
+
+        # Траектории целей (MotionSpline) берут точки из глобального np.random,
+        # поэтому фиксируем seed ДО создания контроллера
+        np.random.seed(seed)
+
+        with self._output():
+            self.controller: Controller = controller_factory(clock=SimClock())
+
+        if kalman_params:
+            for key, value in kalman_params.items():
+                self.controller.set_kalman_param(key, value)
+
+        self.controller.set_auto_mode(auto_mode)
+
+        self.scheduler = None
+        if physics_hz:
+            self.scheduler = LoopScheduler(self.controller, physics_hz, 1.0 / dt)
+
+    def _output(self):
+        """Глушим print() контроллера в тихом режиме"""
+        if self.quiet:
+            return contextlib.redirect_stdout(io.StringIO())
+        return contextlib.nullcontext()
+
+    def run(self, duration, on_step=None):
+        """
+        Прогоняет duration секунд модельного времени.
+        on_step(controller) вызывается после каждого шага.
+        """
+        steps = int(round(duration / self.dt))
+        with self._output():
+            for _ in range(steps):
+                if self.scheduler is not None:
+                    self.scheduler.advance(self.dt)
+                else:
+                    self.controller.update(self.dt)
+                if on_step is not None:
+                    on_step(self.controller)
+
+        return self.controller
+
+    def close(self):
+        """Дописать журналы контроллера (если включены)"""
+        with self._output():
+            self.controller.close()
@@ -0,0 +1,97 @@
+import math
+
+import numpy as np
+
+
+class HitProbabilityEstimator:
+    """
+    Оценка вероятности попадания методом Монте-Карло — одной пачкой NumPy.
+
+    Разыгрываем n выстрелов:
+      - состояние цели из N(X, P) фильтра Калмана (позиция, скорость, ускорение)
+      - ошибку наведения ствола (yaw, pitch)
+      - разброс начальной скорости пули
+    Для каждого ищем момент наибольшего сближения (Ньютон от времени полета)
+    и считаем долю промахов меньше hit_radius.
+    Полет пули — парабола без сопротивления (Y вниз).
+    """
+
+    DEF_SAMPLES = 1000
+    DEF_POINTING_SIGMA = math.radians(0.15)  # рад, дрожание/люфт приводов
+    DEF_MUZZLE_SIGMA = 0.5  # м/с
+    NEWTON_STEPS = 3
+    NOISE_BLOCKS = 8  # сколько пачек шума генерируем заранее
+
+    def __init__(self, n_samples=DEF_SAMPLES,
+                 pointing_sigma=DEF_POINTING_SIGMA,
+                 muzzle_sigma=DEF_MUZZLE_SIGMA,
+                 seed=None):
+        self.n_samples = n_samples
+        self.pointing_sigma = pointing_sigma
+        self.muzzle_sigma = muzzle_sigma
+        self.rng = np.random.default_rng(seed)
+
+        # Стандартные нормальные величины генерируем один раз при создании
+        # (генерация на каждом вызове дороже всего остального расчета).
+        # Столбцы: 9 (цель) + 2 (наведение) + 1 (скорость); пачки берутся по кругу
+        self._noise = self.rng.standard_normal((self.NOISE_BLOCKS, n_samples, 12))
+        self._block = 0
+
+    def estimate(self, X, P, yaw, pitch, v_muzzle, g, hit_radius):
+        """
+        X [9], P [9, 9]: состояние и ковариация Калмана (относительно стрелка)
+        yaw, pitch: куда сейчас смотрит ствол
+        Возвращает P(hit) от 0 до 1.
+        """
+        n = self.n_samples
+        noise = self._noise[self._block]
+        self._block = (self._block + 1) % self.NOISE_BLOCKS
+
+        # 1. Состояния цели: X + L @ z, где P = L @ L.T
+        states = X + noise[:, 0:9] @ self._cholesky(P).T
+        pos = states[:, 0:3]
+        vel = states[:, 3:6]
+        acc = states[:, 6:9]
+
+        # 2. Направление и скорость пули для каждого выстрела
+        s_yaw = yaw + noise[:, 9] * self.pointing_sigma
+        s_pitch = pitch + noise[:, 10] * self.pointing_sigma
+        speed = v_muzzle + noise[:, 11] * self.muzzle_sigma
+
+        cos_p = np.cos(s_pitch)
+        bullet_vel = np.empty((n, 3))
+        bullet_vel[:, 0] = np.sin(s_yaw) * cos_p * speed
+        bullet_vel[:, 1] = -np.sin(s_pitch) * speed
+        bullet_vel[:, 2] = np.cos(s_yaw) * cos_p * speed
+
+        # 3. Относительное движение d(t) = d0 + w*t + c*t^2/2
+        w = vel - bullet_vel
+        c = acc.copy()
+        c[:, 1] -= g
+
+        # Начальное приближение — время полета до текущей позиции
+        t = np.linalg.norm(pos, axis=1) / v_muzzle
+
+        # Ньютон для f(t) = d(t) . d'(t) = 0 (минимум расстояния)
+        for _ in range(self.NEWTON_STEPS):
+            d = pos + w * t[:, None] + c * (0.5 * t * t)[:, None]
+            dd = w + c * t[:, None]
+            f = np.einsum("ij,ij->i", d, dd)
+            df = np.einsum("ij,ij->i", dd, dd) + np.einsum("ij,ij->i", d, c)
+            t = t - f / np.where(np.abs(df) > 1e-9, df, 1e-9)
+            np.maximum(t, 0.0, out=t)
+
+        d = pos + w * t[:, None] + c * (0.5 * t * t)[:, None]
+        miss2 = np.einsum("ij,ij->i", d, d)
+
+        return float(np.count_nonzero(miss2 < hit_radius ** 2)) / n
+
+    @staticmethod
+    def _cholesky(P):
+        """Холецкий с защитой от численно неположительной матрицы"""
+        P = 0.5 * (P + P.T)
+        try:
+            return np.linalg.cholesky(P + np.eye(len(P)) * 1e-12)
+        except np.linalg.LinAlgError:
+            vals, vecs = np.linalg.eigh(P)
+            return vecs * np.sqrt(np.clip(vals, 0.0, None))
@@ -39,6 +39,10 @@ class KalmanPredictor:
         self.R = np.eye(3)
         self._update_matrices()
 
+        # 4. Статистика последней коррекции (для оценки согласованности фильтра)
+        self.last_innovation = np.zeros(3)
+        self.last_nis = 0.0  # Normalized Innovation Squared, в среднем ~3 для 3D
+
     def _update_matrices(self):
         """Внутренний метод для пересчета диагоналей матриц Q и R"""
         # Обновляем Q
@@ -51,7 +55,7 @@ class KalmanPredictor:
 
     def set_params(self,params):
         """динамисески применить настройки из асой массива"""
-        if 'q_ass' in params:
+        if 'q_acc' in params:
             self.q_acc = params['q_acc']
 
         if 'r_noise' in params:
@@ -83,7 +87,7 @@ class KalmanPredictor:
         self._update_matrices()
 
     @q_acc.setter
-    def q_acc(self, value):
+    def q_acc(self, val):
         self._q_acc = val
         self._update_matrices()
 
@@ -110,7 +114,11 @@ class KalmanPredictor:
         z = np.array(z, dtype=float)
         y = z - (self.H @ self.X)
         S = self.H @ self.P @ self.H.T + self.R
-        K = self.P @ self.H.T @ np.linalg.inv(S)
+        S_inv = np.linalg.inv(S)
+        K = self.P @ self.H.T @ S_inv
+
+        self.last_innovation = y
+        self.last_nis = float(y @ S_inv @ y)
 
         self.X = self.X + K @ y
         self.P = (np.eye(9) - K @ self.H) @ self.P
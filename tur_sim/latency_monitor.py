@@ -0,0 +1,115 @@
+import math
+from collections import deque
+
+import numpy as np
+
+
+class RollingStat:
+    """Скользящая статистика по последним size значениям (предвыделенный кольцевой буфер)"""
+
+    def __init__(self, size=256):
+        self.values = np.zeros(size)
+        self.size = size
+        self.count = 0  # сколько значений записано всего
+        self.idx = 0
+
+    def add(self, value):
+        self.values[self.idx] = value
+        self.idx = (self.idx + 1) % self.size
+        self.count += 1
+
+    def _filled(self):
+        return self.values[:min(self.count, self.size)]
+
+    def mean(self):
+        return float(self._filled().mean()) if self.count else 0.0
+
+    def max(self):
+        return float(self._filled().max()) if self.count else 0.0
+
+    def percentile(self, q):
+        """q — число или список процентилей (0..100)"""
+        if not self.count:
+            return 0.0 if np.isscalar(q) else [0.0] * len(q)
+        res = np.percentile(self._filled(), q)
+        return float(res) if np.isscalar(q) else [float(v) for v in res]
+
+
+class LatencyMonitor:
+    """
+    Задержки конвейера кадра: захват -> анализ -> трекинг -> команда -> турель на месте.
+    Каждый кадр несет свои метки времени; приход турели ловим, когда ствол
+    проходит через углы, скомандованные по этому кадру.
+    Время берется из часов контроллера (модельное или реальное).
+    """
+
+    STAGES = ("analysis", "track", "command", "arrival")
+
+    ARRIVAL_TOL = 0.002  # рад, турель считается пришедшей в скомандованные углы
+    MAX_PENDING_AGE = 0.5  # сек, дольше ждать приход бессмысленно
+    MAX_PENDING = 64
+
+    def __init__(self, window=256):
+        # Задержка каждой стадии относительно предыдущей и полная (захват -> приход)
+        self.stages = {name: RollingStat(window) for name in self.STAGES}
+        self.total = RollingStat(window)
+        self.missed_arrivals = 0
+
+        self.pending = deque()  # (capture, command, yaw, pitch)
+
+    @staticmethod
+    def begin_frame(capture_time):
+        """Новый кадр: словарь меток времени, который идет по конвейеру"""
+        return {"capture": capture_time}
+
+    @staticmethod
+    def mark(frame, stage, t):
+        frame[stage] = t
+
+    def on_command(self, frame, yaw, pitch):
+        """Кадр дошел до команды турели: считаем задержки стадий и ждем прихода"""
+        prev = frame["capture"]
+        for stage in ("analysis", "track", "command"):
+            t = frame.get(stage, prev)
+            self.stages[stage].add(t - prev)
+            prev = t
+
+        self.pending.append((frame["capture"], prev, yaw, pitch))
+        if len(self.pending) > self.MAX_PENDING:
+            self.pending.popleft()
+            self.missed_arrivals += 1
+
+    def on_turret(self, now, yaw, pitch):
+        """Вызывать после шага турели: закрываем команды, углы которых достигнуты"""
+        if not self.pending:
+            return
+
+        kept = deque()
+        reached_until = -1
+        for i, (capture, command, c_yaw, c_pitch) in enumerate(self.pending):
+            d_yaw = (c_yaw - yaw + math.pi) % (2 * math.pi) - math.pi
+            if math.hypot(d_yaw, c_pitch - pitch) < self.ARRIVAL_TOL:
+                reached_until = i
+
+        for i, item in enumerate(self.pending):
+            capture, command, _, _ = item
+            if i == reached_until:
+                # Турель пришла в углы этой команды
+                self.stages["arrival"].add(now - command)
+                self.total.add(now - capture)
+            elif i < reached_until:
+                # Более ранние команды уже неактуальны — просто снимаем
+                pass
+            elif now - command > self.MAX_PENDING_AGE:
+                self.missed_arrivals += 1
+            else:
+                kept.append(item)
+        self.pending = kept
+
+    def total_latency(self):
+        """Средняя полная задержка (захват кадра -> турель в скомандованных углах)"""
+        return self.total.mean()
+
+    def pipeline_latency(self):
+        """Средняя задержка обработки (захват кадра -> команда турели)"""
+        return sum(self.stages[s].mean() for s in ("analysis", "track", "command"))
@@ -0,0 +1,60 @@
+class LoopScheduler:
+    """
+    Развязка частот цикла.
+    Физика (мир, приводы, сближение пули) — фиксированным шагом 1/physics_hz:
+    реальное время кадра копится в аккумуляторе и расходуется целыми подшагами,
+    так что точность физики не зависит от того, как быстро рисует UI.
+    Камера, анализ, трекинг и управление — с частотой кадров камеры vision_hz
+    (по модельному времени, на границе шага физики).
+    Отрисовка — снаружи, с частотой дисплея: advance() вызывается раз на кадр.
+    """
+
+    MAX_FRAME_DT = 0.25  # сек, длинный кадр (перетаскивание окна, отладчик) не догоняем
+    MAX_SUBSTEPS = 32  # шагов физики за один advance; остаток отбрасываем
+    EPS = 1e-9
+
+    def __init__(self, controller, physics_hz=None, vision_hz=None):
+        self.controller = controller
+        self.physics_dt = 1.0 / (physics_hz or controller.PHYSICS_HZ)
+        self.vision_dt = 1.0 / (vision_hz or controller.VISION_HZ)
+
+        self.acc = 0.0  # накопленное, но еще не просчитанное время
+        self.vision_acc = 0.0  # время до следующего кадра камеры
+        self.since_vision = 0.0  # модельное время с прошлого кадра камеры
+
+        # Счетчики
+        self.physics_steps = 0
+        self.vision_steps = 0
+        self.last_substeps = 0
+        self.dropped_time = 0.0
+
+    def advance(self, frame_dt):
+        """Прогнать накопленное время. Возвращает alpha — долю шага, оставшуюся в аккумуляторе"""
+        if frame_dt > self.MAX_FRAME_DT:
+            self.dropped_time += frame_dt - self.MAX_FRAME_DT
+            frame_dt = self.MAX_FRAME_DT
+        self.acc += frame_dt
+
+        substeps = 0
+        while self.acc >= self.physics_dt - self.EPS:
+            if substeps >= self.MAX_SUBSTEPS:
+                # Физика не успевает за реальным временем — не копим долг
+                self.dropped_time += self.acc
+                self.acc = 0.0
+                break
+
+            self.controller.step_physics(self.physics_dt)
+            self.acc -= self.physics_dt
+            substeps += 1
+            self.physics_steps += 1
+
+            self.vision_acc += self.physics_dt
+            self.since_vision += self.physics_dt
+            if self.vision_acc >= self.vision_dt - self.EPS:
+                self.controller.step_vision(self.since_vision)
+                self.vision_acc -= self.vision_dt
+                self.since_vision = 0.0
+                self.vision_steps += 1
+
+        self.last_substeps = substeps
+        return max(self.acc, 0.0) / self.physics_dt
@@ -29,6 +29,21 @@ class MotionBallistic:
         new_pos = current_pos + self.velocity * dt
         return new_pos
 
+class MotionDrag(MotionBase):
+    """
+    Полет снаряда по ProjectileModel (гравитация + сопротивление + ветер, RK4).
+    PhysicalWorld двигает все такие снаряды одной пачкой, get_next_pos —
+    запасной путь для одиночного объекта.
+    """
+    def __init__(self, velocity, model):
+        self.velocity = np.array(velocity, dtype=float)
+        self.model = model
+
+    def get_next_pos(self, current_pos, dt):
+        new_pos, new_vel = self.model.step(current_pos[None, :], self.velocity[None, :], dt)
+        self.velocity = new_vel[0]
+        return new_pos[0]
+
 class MotionCircular(MotionBase):
     def __init__(self, center, radius, speed):
         self.center = np.array(center)
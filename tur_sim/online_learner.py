@@ -0,0 +1,261 @@
+import multiprocessing as mp
+import queue
+
+import numpy as np
+
+from .fused_corrector import FusedCorrector, fold_scalers, unfold_scalers
+
+
+class OnlineLearner:
+    """
+    Дообучение корректора прямо во время работы.
+    Записи (state, required_delta) из _finalize_shot уходят в отдельный процесс,
+    где копия BallisticsNet учится мини-батчами из буфера воспроизведения.
+    Каждая новая версия проверяется на отложенных записях и публикуется,
+    только если ошибка меньше, чем у текущей (или чем без поправки вовсе).
+    Опубликованные веса (скалеры уже вшиты) подменяются в FusedCorrector
+    одним присваиванием — цикл управления не ждет и не грузит torch.
+    """
+
+    QUEUE_SIZE = 1024  # записей в пути к процессу; при переполнении отбрасываем
+
+    # Параметры процесса-ученика
+    REPLAY_SIZE = 20000  # буфер воспроизведения (обучение)
+    VAL_SIZE = 2000  # отложенные записи для проверки версий
+    VAL_EVERY = 5  # каждая 5-я запись идет в проверку
+    MIN_RECORDS = 64  # минимум записей для первого обучения
+    UPDATE_EVERY = 16  # новых записей между раундами обучения
+    STEPS_PER_UPDATE = 50  # шагов оптимизатора за раунд
+    BATCH_SIZE = 64
+    LR = 0.0005
+
+    def __init__(self, initial=None):
+        """
+        initial: (weights, biases) корректора, который сейчас стоит в цикле управления
+        (FusedCorrector.get_weights) — ученик продолжает с них и сравнивает кандидатов
+        именно с ними. None — учимся с нуля
+        """
+        ctx = mp.get_context("spawn")  # без fork: в основном процессе уже есть потоки
+        self.in_q = ctx.Queue(self.QUEUE_SIZE)
+        self.out_q = ctx.Queue()
+
+        config = {
+            "initial": initial,
+            "replay_size": self.REPLAY_SIZE,
+            "val_size": self.VAL_SIZE,
+            "val_every": self.VAL_EVERY,
+            "min_records": self.MIN_RECORDS,
+            "update_every": self.UPDATE_EVERY,
+            "steps": self.STEPS_PER_UPDATE,
+            "batch_size": self.BATCH_SIZE,
+            "lr": self.LR,
+        }
+        self.process = ctx.Process(target=_learner_main, args=(self.in_q, self.out_q, config),
+                                   name="OnlineLearner", daemon=True)
+        self.process.start()
+
+        # Счетчики
+        self.submitted = 0
+        self.dropped = 0
+        self.version = 0
+        self.val_loss = None
+        self.records = 0
+
+    def submit(self, state, required_delta):
+        """Новая запись из выстрела (не блокирует)"""
+        if required_delta is None:
+            return
+        record = np.concatenate([np.asarray(state, dtype=float), np.asarray(required_delta, dtype=float)])
+        try:
+            self.in_q.put_nowait(record)
+            self.submitted += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def poll(self, corrector: FusedCorrector):
+        """Вызывать из цикла управления: подменяет веса, если пришла новая версия"""
+        latest = None
+        while True:
+            try:
+                latest = self.out_q.get_nowait()
+            except queue.Empty:
+                break
+
+        if latest is None:
+            return False
+
+        self.version = latest["version"]
+        self.val_loss = latest["val_loss"]
+        self.records = latest["records"]
+        corrector.set_weights(latest["weights"], latest["biases"])
+        print(f"Online learner: версия {self.version}, "
+              f"val RMSE {np.sqrt(self.val_loss):.5f} рад, записей {self.records}")
+        return True
+
+    def close(self, timeout=5.0):
+        if self.process.is_alive():
+            try:
+                self.in_q.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+        # Если ученик умер раньше, фоновый поток очереди висит на записи в трубу
+        # без читателя — не ждем его на выходе из процесса
+        self.in_q.cancel_join_thread()
+
+
+class _Learner:
+    """Сторона процесса-ученика (здесь уже можно torch)"""
+
+    def __init__(self, cfg):
+        import torch
+        from .ballistics_corrector import BallisticsNet
+
+        torch.set_num_threads(1)  # не отнимаем ядра у цикла управления
+        self.torch = torch
+        self.cfg = cfg
+
+        self.train_buf = np.zeros((cfg["replay_size"], 8))
+        self.train_n = 0
+        self.val_buf = np.zeros((cfg["val_size"], 8))
+        self.val_n = 0
+        self.total = 0
+        self.new_since_update = 0
+
+        self.model = BallisticsNet()
+        self.scaler = None  # (mean_x, scale_x, mean_y, scale_y) — фиксируются один раз
+        self.published = False
+        self.version = 0
+
+        # Веса корректора из цикла управления (скалеры вшиты): разворачиваем их
+        # под скалер ученика на первом раунде, когда скалер уже посчитан
+        self.initial = cfg["initial"]
+        self.published = self.initial is not None  # стартовая модель уже в корректоре
+
+        self.optimizer = torch.optim.Adam(self.model.parameters(), lr=cfg["lr"])
+        self.rng = np.random.default_rng(0)
+
+    def add(self, record):
+        """Кольцевые буферы: каждая val_every-я запись — в проверку"""
+        if self.total % self.cfg["val_every"] == 0:
+            self.val_buf[self.val_n % len(self.val_buf)] = record
+            self.val_n += 1
+        else:
+            self.train_buf[self.train_n % len(self.train_buf)] = record
+            self.train_n += 1
+        self.total += 1
+        self.new_since_update += 1
+
+    def ready(self):
+        return (self.new_since_update >= self.cfg["update_every"]
+                and self.train_n >= self.cfg["min_records"] and self.val_n > 0)
+
+    def _scaled(self, rows):
+        mean_x, scale_x, mean_y, scale_y = self.scaler
+        return (rows[:, :6] - mean_x) / scale_x, (rows[:, 6:] - mean_y) / scale_y
+
+    def _val_mse(self, model):
+        """Средний квадрат ошибки поправки в радианах на отложенных записях"""
+        torch = self.torch
+        val = self.val_buf[:min(self.val_n, len(self.val_buf))]
+        x, _ = self._scaled(val)
+        with torch.no_grad():
+            pred = model(torch.from_numpy(x.astype(np.float32))).numpy()
+        mean_y, scale_y = self.scaler[2], self.scaler[3]
+        return float(np.mean((pred * scale_y + mean_y - val[:, 6:]) ** 2))
+
+    def _load_initial(self):
+        """Стартовые веса в модель: та же функция, что у корректора, в масштабе self.scaler"""
+        torch = self.torch
+        weights, biases = unfold_scalers(*self.initial, *self.scaler)
+        linears = [m for m in self.model.net if isinstance(m, torch.nn.Linear)]
+        with torch.no_grad():
+            for m, w, b in zip(linears, weights, biases):
+                m.weight.copy_(torch.from_numpy(w))
+                m.bias.copy_(torch.from_numpy(b))
+        self.initial = None
+
+    def update(self):
+        """Раунд дообучения копии модели; возвращает версию для публикации или None"""
+        import copy
+        torch = self.torch
+        self.new_since_update = 0
+
+        train = self.train_buf[:min(self.train_n, len(self.train_buf))]
+        if self.scaler is None:
+            # Скалеры по первым записям; дальше не меняем, иначе сеть "поплывет"
+            self.scaler = (train[:, :6].mean(0), np.maximum(train[:, :6].std(0), 1e-9),
+                           train[:, 6:].mean(0), np.maximum(train[:, 6:].std(0), 1e-9))
+            if self.initial is not None:
+                self._load_initial()
+
+        candidate = copy.deepcopy(self.model)
+        optimizer = torch.optim.Adam(candidate.parameters(), lr=self.cfg["lr"])
+        optimizer.load_state_dict(self.optimizer.state_dict())
+        criterion = torch.nn.MSELoss()
+
+        x_all, y_all = self._scaled(train)
+        x_all = torch.from_numpy(x_all.astype(np.float32))
+        y_all = torch.from_numpy(y_all.astype(np.float32))
+        for _ in range(self.cfg["steps"]):
+            idx = torch.from_numpy(self.rng.integers(0, len(train), self.cfg["batch_size"]))
+            optimizer.zero_grad()
+            loss = criterion(candidate(x_all[idx]), y_all[idx])
+            loss.backward()
+            optimizer.step()
+
+        # Проверка: лучше текущей версии (или, пока ничего нет, лучше нулевой поправки)
+        val = self.val_buf[:min(self.val_n, len(self.val_buf))]
+        if self.published:
+            reference = self._val_mse(self.model)
+        else:
+            reference = float(np.mean(val[:, 6:] ** 2))
+        cand_loss = self._val_mse(candidate)
+
+        if cand_loss >= reference:
+            return None
+
+        self.model = candidate
+        self.optimizer = optimizer
+        self.published = True
+        self.version += 1
+
+        linears = [m for m in self.model.net if isinstance(m, torch.nn.Linear)]
+        weights, biases = fold_scalers(
+            [m.weight.detach().double().numpy() for m in linears],
+            [m.bias.detach().double().numpy() for m in linears],
+            *self.scaler,
+        )
+        return {"version": self.version, "val_loss": cand_loss, "records": self.total,
+                "weights": weights, "biases": biases}
+
+
+def _learner_main(in_q, out_q, cfg):
+    """Точка входа процесса-ученика"""
+    learner = _Learner(cfg)
+    while True:
+        try:
+            item = in_q.get(timeout=0.2)
+        except queue.Empty:
+            continue
+
+        # Забираем все, что накопилось
+        stop = False
+        while item is not None:
+            learner.add(item)
+            try:
+                item = in_q.get_nowait()
+            except queue.Empty:
+                break
+        else:
+            stop = True
+
+        if learner.ready():
+            result = learner.update()
+            if result is not None:
+                out_q.put(result)
+
+        if stop:
+            break
@@ -25,7 +25,8 @@ class PhysicalObject:
             self.explosion_timer = self.explosion_time
             self.obj_type = "explosion"  # Чтобы ImageAnalyzer мог игнорировать или узнавать
 
-    def update(self, dt):
+    def update(self, dt, next_pos=None):
+        """next_pos — позиция, уже рассчитанная миром пачкой (тогда behavior не вызываем)"""
 
         if self.is_exploding:
             self.explosion_timer -= dt
@@ -40,7 +41,9 @@ class PhysicalObject:
                 self.is_dead = True
             return  # Если взрываемся, не летим дальше
 
-        if self.behavior is not None:
+        if next_pos is not None:
+            self.pos = next_pos
+        elif self.behavior is not None:
             self.pos = self.behavior.get_next_pos(self.pos, dt)
 
         # Если задано время жизни, уменьшаем его
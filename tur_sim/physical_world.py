@@ -1,5 +1,8 @@
 import numpy as np
 
+from .motion_base import MotionDrag
+
+
 class PhysicalWorld:
     def __init__(self):
         self.objects = []
@@ -10,8 +13,11 @@ class PhysicalWorld:
         self.objects.append(obj)
 
     def update(self, dt):
+        # 1. Снаряды с моделью сопротивления двигаем пачкой (один RK4 на все)
+        next_pos = self._step_projectiles(dt)
+
         for obj in self.objects:
-            obj.update(dt)
+            obj.update(dt, next_pos.get(id(obj)))
 
         # Здесь в будущем будет проверка коллизий (попаданий)
         # 2. Проверяем столкновения (пули с целями)
@@ -31,4 +37,24 @@ class PhysicalWorld:
                     print(f"HIT! Score: {self.score}")
 
         # 3. Удаляем "мертвые" объекты
-        self.objects = [o for o in self.objects if not o.is_dead]
\ No newline at end of file
+        self.objects = [o for o in self.objects if not o.is_dead]
+
+    def _step_projectiles(self, dt):
+        """Шаг всех снарядов MotionDrag, сгруппированных по модели: {id(obj): new_pos}"""
+        groups = {}
+        for o in self.objects:
+            if isinstance(o.behavior, MotionDrag) and not o.is_exploding and not o.is_dead:
+                groups.setdefault(id(o.behavior.model), []).append(o)
+
+        next_pos = {}
+        for objs in groups.values():
+            model = objs[0].behavior.model
+            pos = np.array([o.pos for o in objs])
+            vel = np.array([o.behavior.velocity for o in objs])
+
+            new_pos, new_vel = model.step(pos, vel, dt)
+
+            for i, o in enumerate(objs):
+                o.behavior.velocity = new_vel[i]
+                next_pos[id(o)] = new_pos[i]
+        return next_pos
\ No newline at end of file
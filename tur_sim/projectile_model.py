@@ -0,0 +1,136 @@
+import math
+
+import numpy as np
+
+
+class ProjectileModel:
+    """
+    Модель полета снаряда: гравитация + квадратичное сопротивление воздуха + постоянный ветер.
+    Все методы работают пачкой: pos, vel — массивы [N, 3] (одна строка — один снаряд).
+    Мир: Y растет ВНИЗ, поэтому гравитация = +g по оси Y.
+
+    a = g_vec - k * |v - wind| * (v - wind),   k = rho * Cd * A / (2 * m)
+    """
+
+    AIR_DENSITY = 1.225  # кг/м^3
+
+    def __init__(self, g, drag_k=0.0, wind=None):
+        """
+        g: ускорение свободного падения
+        drag_k: коэффициент квадратичного сопротивления (1/м), 0 — только гравитация
+        wind: вектор ветра [3] в м/с (None — безветрие)
+        """
+        self.g = float(g)
+        self.drag_k = float(drag_k)
+        self.wind = np.zeros(3) if wind is None else np.asarray(wind, dtype=float)
+        self._g_vec = np.array([0.0, self.g, 0.0])
+
+    @classmethod
+    def from_physical(cls, g, drag_coef, mass, radius, wind=None, air_density=AIR_DENSITY):
+        """Модель из физических параметров снаряда (Cd, масса в кг, радиус в м)"""
+        area = math.pi * radius ** 2
+        drag_k = air_density * drag_coef * area / (2.0 * mass)
+        return cls(g, drag_k, wind)
+
+    def acceleration(self, vel, out=None):
+        """Ускорение для скоростей [N, 3] (out — необязательный буфер [N, 3])"""
+        if out is None:
+            out = np.empty_like(vel)
+
+        if self.drag_k <= 0:
+            out[:] = self._g_vec
+            return out
+
+        rel = vel - self.wind if self._has_wind() else vel
+        speed = np.sqrt(np.einsum("ij,ij->i", rel, rel))
+        speed *= -self.drag_k
+        np.multiply(rel, speed[:, None], out=out)
+        out[:, 1] += self.g
+        return out
+
+    def _has_wind(self):
+        return bool(self.wind.any())
+
+    def step(self, pos, vel, dt):
+        """Один шаг RK4 для всех снарядов: возвращает (new_pos, new_vel)"""
+        pos = np.asarray(pos, dtype=float)
+        vel = np.asarray(vel, dtype=float)
+
+        if self.drag_k <= 0:
+            # Без сопротивления RK4 дает точное решение — считаем сразу
+            return pos + vel * dt + 0.5 * self._g_vec * dt ** 2, vel + self._g_vec * dt
+
+        buf = self._buffers(vel.shape)
+        a1, a2, a3, a4, v2, v3, v4 = buf
+        half = 0.5 * dt
+
+        self.acceleration(vel, a1)
+        np.multiply(a1, half, out=v2)
+        v2 += vel
+        self.acceleration(v2, a2)
+        np.multiply(a2, half, out=v3)
+        v3 += vel
+        self.acceleration(v3, a3)
+        np.multiply(a3, dt, out=v4)
+        v4 += vel
+        self.acceleration(v4, a4)
+
+        # Взвешенные суммы: (k1 + 2*k2 + 2*k3 + k4) * dt / 6
+        v2 += v3
+        v2 *= 2.0
+        v2 += vel
+        v2 += v4
+        new_pos = v2
+        new_pos *= dt / 6.0
+        new_pos += pos
+
+        a2 += a3
+        a2 *= 2.0
+        a2 += a1
+        a2 += a4
+        new_vel = a2
+        new_vel *= dt / 6.0
+        new_vel += vel
+
+        # Результат отдаем копиями — буферы переиспользуются на следующем шаге
+        return new_pos.copy(), new_vel.copy()
+
+    def _buffers(self, shape):
+        """Предвыделенные буферы шага RK4 под текущий размер пачки"""
+        buf = getattr(self, "_rk4_buf", None)
+        if buf is None or buf[0].shape != shape:
+            buf = tuple(np.empty(shape) for _ in range(7))
+            self._rk4_buf = buf
+        return buf
+
+    def simulate(self, pos0, vel0, dt, t_max, record=True):
+        """
+        Офлайн расчет пачки траекторий.
+        pos0, vel0: [N, 3] (или [3] для одной траектории)
+        record=True: возвращает (times [T], positions [T, N, 3], velocities [T, N, 3]),
+        record=False: только конечное состояние (t_end, pos [N, 3], vel [N, 3]).
+        """
+        pos = np.atleast_2d(np.asarray(pos0, dtype=float))
+        vel = np.atleast_2d(np.asarray(vel0, dtype=float))
+        if len(pos) == 1 and len(vel) > 1:
+            pos = np.repeat(pos, len(vel), axis=0)
+
+        steps = int(math.ceil(t_max / dt))
+
+        if not record:
+            for _ in range(steps):
+                pos, vel = self.step(pos, vel, dt)
+            return steps * dt, pos, vel
+
+        positions = np.empty((steps + 1, len(pos), 3))
+        velocities = np.empty((steps + 1, len(pos), 3))
+        positions[0] = pos
+        velocities[0] = vel
+
+        for i in range(steps):
+            pos, vel = self.step(pos, vel, dt)
+            positions[i + 1] = pos
+            velocities[i + 1] = vel
+
+        times = np.arange(steps + 1) * dt
+        return times, positions, velocities
@@ -0,0 +1,153 @@
+import os
+
+import numpy as np
+
+
+class RLSCorrector:
+    """
+    Легкий корректор без torch: полиномиальные признаки 2-й степени
+    от вектора get_nn_state + рекурсивный МНК (RLS).
+    Интерфейс как у BallisticsCorrector, плюс update() после каждого выстрела
+    за постоянное время O(F^2), F = 28 признаков.
+
+    Входы нормируются фиксированными масштабами (признаки не должны меняться
+    во время обучения), масштабы можно один раз подобрать по данным — fit_scaling.
+    """
+
+    MODEL_PATH = "data/rls_corrector.npz"
+
+    N_INPUTS = 6
+    # Типичные значения (err_yaw, err_pitch, v_yaw, v_pitch, dist, turret_pitch)
+    DEF_CENTER = np.array([0.0, 0.0, 0.0, 0.0, 25.0, 0.0])
+    DEF_SCALE = np.array([0.01, 0.01, 0.3, 0.3, 15.0, 0.3])
+
+    # Нормированные входы обрезаем: вне обычного диапазона (например, ошибка
+    # наведения во время разворота) квадратичные члены иначе улетают
+    Z_CLIP = 3.0
+
+    # Промахи с тяжелыми хвостами (маневр цели, а не баллистика): ошибку
+    # предсказания в обновлении обрезаем, как в функции потерь Хьюбера
+    ERR_CLIP = 0.01  # рад
+
+    FORGET = 0.999  # коэффициент забывания (1.0 — помнить все)
+    P0 = 0.1  # начальная неопределенность весов (меньше — сильнее тянем к нулевой поправке)
+    MIN_UPDATES = 50  # до этого поправку не выдаем
+
+    def __init__(self, path=MODEL_PATH, forget=FORGET):
+        self.forget = forget
+        self.center = self.DEF_CENTER.copy()
+        self.scale = self.DEF_SCALE.copy()
+
+        # Пары (i, j), i <= j — квадратичные члены
+        iu = np.triu_indices(self.N_INPUTS)
+        self._pair_i, self._pair_j = iu
+        self.n_features = 1 + self.N_INPUTS + len(iu[0])
+
+        self.reset()
+        self._z = np.empty(self.N_INPUTS)
+        self._phi = np.empty(self.n_features)
+
+        if path and os.path.exists(path):
+            try:
+                self.load(path)
+                print("RLS Corrector: Loaded successfully")
+            except Exception as e:
+                print(f"RLS Corrector Error: Could not load {path}. {e}")
+
+    def reset(self):
+        self.W = np.zeros((self.n_features, 2))
+        self.P = np.eye(self.n_features) * self.P0
+        self.n_updates = 0
+
+    @property
+    def is_ready(self):
+        return self.n_updates >= self.MIN_UPDATES
+
+    def fit_scaling(self, states):
+        """Центр и масштаб входов по выборке (делать до обучения: меняет признаки)"""
+        states = np.asarray(states, dtype=float).reshape(-1, self.N_INPUTS)
+        self.center = states.mean(axis=0)
+        self.scale = np.maximum(states.std(axis=0), 1e-9)
+        self.reset()
+
+    # --- признаки ---
+
+    def features_batch(self, states):
+        """[N, 6] -> [N, F]: 1, z, z_i * z_j (i <= j), z — нормированные входы"""
+        z = (np.asarray(states, dtype=float).reshape(-1, self.N_INPUTS) - self.center) / self.scale
+        np.clip(z, -self.Z_CLIP, self.Z_CLIP, out=z)
+        phi = np.empty((len(z), self.n_features))
+        phi[:, 0] = 1.0
+        phi[:, 1:1 + self.N_INPUTS] = z
+        phi[:, 1 + self.N_INPUTS:] = z[:, self._pair_i] * z[:, self._pair_j]
+        return phi
+
+    def _features(self, state):
+        """Одна строка в предвыделенный буфер"""
+        z = self._z
+        np.subtract(state, self.center, out=z)
+        z /= self.scale
+        np.minimum(z, self.Z_CLIP, out=z)
+        np.maximum(z, -self.Z_CLIP, out=z)
+        phi = self._phi
+        phi[0] = 1.0
+        phi[1:1 + self.N_INPUTS] = z
+        np.multiply(z[self._pair_i], z[self._pair_j], out=phi[1 + self.N_INPUTS:])
+        return phi
+
+    # --- предсказание ---
+
+    def get_correction_batch(self, states):
+        """states [N, 6] -> [N, 2] (d_yaw, d_pitch) в радианах"""
+        states = np.asarray(states, dtype=float).reshape(-1, self.N_INPUTS)
+        if not self.is_ready:
+            return np.zeros((len(states), 2))
+        return self.features_batch(states) @ self.W
+
+    def get_correction(self, err_yaw, err_pitch, v_yaw, v_pitch, dist, turret_pitch):
+        """
+        Принимает текущее состояние и возвращает (d_yaw, d_pitch) в радианах.
+        """
+        if not self.is_ready:
+            return 0.0, 0.0
+        phi = self._features((err_yaw, err_pitch, v_yaw, v_pitch, dist, turret_pitch))
+        d = phi @ self.W
+        return float(d[0]), float(d[1])
+
+    # --- обучение ---
+
+    def update(self, state, delta):
+        """Один шаг RLS: state [6], delta — нужная поправка (d_yaw, d_pitch)"""
+        phi = self._features(state)
+        Pphi = self.P @ phi
+        k = Pphi / (self.forget + phi @ Pphi)
+        err = np.asarray(delta, dtype=float) - phi @ self.W
+        np.clip(err, -self.ERR_CLIP, self.ERR_CLIP, out=err)
+        self.W += np.outer(k, err)
+        self.P -= np.outer(k, Pphi)
+        self.P /= self.forget
+        # Симметрия P портится от округлений — поправляем
+        self.P = 0.5 * (self.P + self.P.T)
+        self.n_updates += 1
+
+    def update_batch(self, states, deltas):
+        for state, delta in zip(np.asarray(states, dtype=float), np.asarray(deltas, dtype=float)):
+            self.update(state, delta)
+
+    # --- сохранение ---
+
+    def save(self, path=MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(path, W=self.W, P=self.P, center=self.center, scale=self.scale,
+                 n_updates=np.array(self.n_updates), forget=np.array(self.forget))
+
+    def load(self, path):
+        data = np.load(path)
+        if data["W"].shape != (self.n_features, 2):
+            raise ValueError("размер признаков в файле не совпадает")
+        self.W = data["W"]
+        self.P = data["P"]
+        self.center = data["center"]
+        self.scale = data["scale"]
+        self.n_updates = int(data["n_updates"])
+        self.forget = float(data["forget"])
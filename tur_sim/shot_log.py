@@ -0,0 +1,280 @@
+import json
+import os
+
+import numpy as np
+
+
+class ShotLog:
+    """
+    Колоночный бинарный журнал выстрелов.
+    Это каталог (обычно *.shots):
+      schema.json     — список колонок, тип и версия формата
+      <колонка>.bin   — сырые значения колонки подряд (float64, little-endian)
+    Дописывается в конец без перезаписи; читается через np.memmap без копирования,
+    так что открытие многогигабайтного журнала мгновенное.
+    """
+
+    EXT = ".shots"
+    SCHEMA_FILE = "schema.json"
+    DTYPE = np.dtype("<f8")
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, self.SCHEMA_FILE)) as f:
+            schema = json.load(f)
+        if schema.get("version") != self.VERSION:
+            raise ValueError(f"{path}: неизвестная версия формата {schema.get('version')}")
+        self.columns = list(schema["columns"])
+        self.dtype = np.dtype(schema["dtype"])
+
+        # Строк столько, сколько полностью записано во все колонки
+        sizes = [os.path.getsize(self._column_path(path, c)) for c in self.columns]
+        self.rows = min(sizes) // self.dtype.itemsize if sizes else 0
+        self._maps = {}
+
+    @classmethod
+    def is_shot_log(cls, path):
+        return os.path.isfile(os.path.join(path, cls.SCHEMA_FILE))
+
+    @staticmethod
+    def _column_path(path, column):
+        return os.path.join(path, f"{column}.bin")
+
+    @classmethod
+    def create(cls, path, columns):
+        """
+        Новый пустой журнал или существующий, дополненный колонками columns.
+        Новая колонка в старом журнале (например time) заводится и для уже
+        записанных строк заполняется NaN, так что старый журнал не мешает старту
+        """
+        if cls.is_shot_log(path):
+            existing = cls(path)
+            missing = [c for c in columns if c not in existing.columns]
+            if not missing:
+                return existing
+            nan_rows = np.full(existing.rows, np.nan, dtype=existing.dtype).tobytes()
+            for c in missing:
+                with open(cls._column_path(path, c), "wb") as f:
+                    f.write(nan_rows)
+            cls._write_schema(path, existing.columns + missing, existing.dtype)
+            print(f"ShotLog: в {path} добавлены колонки {missing}")
+            return cls(path)
+
+        os.makedirs(path, exist_ok=True)
+        for c in columns:
+            open(cls._column_path(path, c), "ab").close()
+        cls._write_schema(path, columns, cls.DTYPE)
+        return cls(path)
+
+    @classmethod
+    def _write_schema(cls, path, columns, dtype):
+        schema = {"version": cls.VERSION, "dtype": np.dtype(dtype).str, "columns": list(columns)}
+        tmp = os.path.join(path, cls.SCHEMA_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(schema, f, indent=2)
+        os.replace(tmp, os.path.join(path, cls.SCHEMA_FILE))
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, column):
+        """Колонка целиком — memmap только для чтения, без копирования"""
+        m = self._maps.get(column)
+        if m is None:
+            if column not in self.columns:
+                raise KeyError(column)
+            if self.rows == 0:
+                m = np.empty(0, dtype=self.dtype)
+            else:
+                m = np.memmap(self._column_path(self.path, column), dtype=self.dtype,
+                              mode="r", shape=(self.rows,))
+            self._maps[column] = m
+        return m
+
+    def matrix(self, columns, start=0, stop=None):
+        """Выбранные колонки в диапазоне строк одной матрицей [n, len(columns)] (копия)"""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        out = np.empty((max(stop - start, 0), len(columns)))
+        for j, c in enumerate(columns):
+            out[:, j] = self[c][start:stop]
+        return out
+
+    def iter_chunks(self, columns, chunk_size):
+        """Диапазоны строк по chunk_size: (start, матрица колонок)"""
+        for start in range(0, self.rows, chunk_size):
+            yield start, self.matrix(columns, start, start + chunk_size)
+
+
+class ShotLogWriter:
+    """
+    Дописывание строк в ShotLog: по файлу на колонку, файлы держим открытыми.
+    Колонки журнала, которых нет в columns, дописываются NaN — строки не разъезжаются
+    """
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        log = ShotLog.create(path, self.columns)
+        self._sources = [self.columns.index(c) if c in self.columns else None for c in log.columns]
+        self._itemsize = log.dtype.itemsize
+        self.rows = log.rows
+        self._files = []
+        for c in log.columns:
+            # Без буфера: ошибка записи всплывает в append, а не в позднем flush
+            f = open(ShotLog._column_path(path, c), "ab", buffering=0)
+            # Недописанный хвост (оборванная запись) отрезаем, чтобы колонки шли вровень
+            f.truncate(self.rows * self._itemsize)
+            self._files.append(f)
+
+    def append(self, rows):
+        """
+        rows [n, len(columns)] — пишем пачкой, по одной последовательной записи на колонку.
+        Если запись оборвалась на середине, все колонки обрезаются до прежнего
+        числа строк, и ошибка пробрасывается дальше
+        """
+        rows = np.asarray(rows, dtype=ShotLog.DTYPE).reshape(-1, len(self.columns))
+        try:
+            for j, f in zip(self._sources, self._files):
+                if j is None:
+                    _write_all(f, np.full(len(rows), np.nan, dtype=ShotLog.DTYPE).tobytes())
+                else:
+                    _write_all(f, np.ascontiguousarray(rows[:, j]).tobytes())
+        except BaseException:
+            for f in self._files:
+                os.ftruncate(f.fileno(), self.rows * self._itemsize)
+            raise
+        self.rows += len(rows)
+
+    def flush(self):
+        for f in self._files:
+            f.flush()
+
+    def close(self):
+        for f in self._files:
+            f.close()
+        self._files = []
+
+
+def _write_all(f, data):
+    """Небуферизованный write может записать не все — дописываем остаток"""
+    view = memoryview(data)
+    while view:
+        view = view[f.write(view):]
+
+
+def read_columns(path, columns):
+    """
+    Колонки из журнала любого формата: {имя: массив}.
+    Для ShotLog — memmap без копирования, для CSV — через pandas.
+    """
+    if ShotLog.is_shot_log(path):
+        log = ShotLog(path)
+        return {c: log[c] for c in columns}
+
+    import pandas as pd
+    df = pd.read_csv(path, usecols=columns)
+    return {c: df[c].to_numpy(np.float64) for c in columns}
+
+
+HOLDOUT_HASH = 2654435761  # множитель Кнута: детерминированное разбиение строк на train/val
+
+
+def chunk_ranges(path, chunk_size, block_size=1 << 24):
+    """
+    Разбиение журнала на куски по chunk_size строк: [(первая строка, начало, конец)].
+    ShotLog — начало/конец в строках; CSV — в байтах (границы по переводу строки,
+    один быстрый проход по байтам без разбора). Куски читаются независимо
+    (read_chunk), так что их можно раздать процессам: каждый разбирает только свои.
+    """
+    if ShotLog.is_shot_log(path):
+        rows = len(ShotLog(path))
+        return [(start, start, min(start + chunk_size, rows)) for start in range(0, rows, chunk_size)]
+
+    ranges = []
+    with open(path, "rb") as f:
+        f.readline()  # заголовок
+        begin = pos = f.tell()
+        lines = 0
+        last = b"\n"
+        while True:
+            buf = f.read(block_size)
+            if not buf:
+                break
+            newlines = np.flatnonzero(np.frombuffer(buf, dtype=np.uint8) == ord("\n"))
+            # Переводы строк, на которых кончается очередной кусок
+            first = chunk_size - lines % chunk_size - 1
+            for end in newlines[first::chunk_size] + pos + 1:
+                ranges.append((len(ranges) * chunk_size, begin, int(end)))
+                begin = int(end)
+            lines += len(newlines)
+            pos += len(buf)
+            last = buf[-1:]
+    if pos > begin and (last != b"\n" or lines > len(ranges) * chunk_size):
+        ranges.append((len(ranges) * chunk_size, begin, pos))
+    return ranges
+
+
+def read_chunk(path, chunk, columns, csv_columns=None):
+    """
+    Кусок из chunk_ranges: (номера строк [n], матрица колонок [n, len(columns)]).
+    Строки с NaN/inf отброшены; номера — исходные, до отбрасывания.
+    csv_columns — заголовок CSV (чтобы не читать его на каждый кусок)
+    """
+    row_start, begin, end = chunk
+    if ShotLog.is_shot_log(path):
+        block = ShotLog(path).matrix(columns, begin, end)
+    else:
+        import io
+
+        import pandas as pd
+        if csv_columns is None:
+            csv_columns = list(pd.read_csv(path, nrows=0).columns)
+        with open(path, "rb") as f:
+            f.seek(begin)
+            raw = f.read(end - begin)
+        df = pd.read_csv(io.BytesIO(raw), header=None, names=csv_columns, usecols=columns)
+        block = df[columns].to_numpy(np.float64)
+
+    rows = np.arange(row_start, row_start + len(block))
+    ok = np.isfinite(block).all(axis=1)
+    return rows[ok], block[ok]
+
+
+def iter_row_chunks(path, columns, chunk_size=100_000, ranges=None):
+    """Куски журнала подряд: (номера строк, матрица колонок). ranges — подмножество chunk_ranges"""
+    if ranges is None:
+        ranges = chunk_ranges(path, chunk_size)
+    csv_columns = None
+    if not ShotLog.is_shot_log(path):
+        import pandas as pd
+        csv_columns = list(pd.read_csv(path, nrows=0).columns)
+    for chunk in ranges:
+        yield read_chunk(path, chunk, columns, csv_columns)
+
+
+def holdout_mask(rows, frac):
+    """
+    Строка уходит в отложенную часть по хешу ее номера в журнале: разбиение
+    не зависит от размера кусков, числа воркеров и строк с NaN вокруг
+    """
+    idx = np.asarray(rows, dtype=np.uint64)
+    return (idx * np.uint64(HOLDOUT_HASH)) % np.uint64(1000) < np.uint64(round(frac * 1000))
+
+
+def convert_csv(csv_path, out_path, chunk_size=100_000):
+    """Конвертация CSV журнала (BallisticsLogger) в ShotLog. Возвращает число строк"""
+    import pandas as pd
+
+    writer = None
+    rows = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        if writer is None:
+            writer = ShotLogWriter(out_path, chunk.columns)
+        # True/False (is_hit) -> 1.0/0.0
+        writer.append(chunk.astype(np.float64).to_numpy())
+        rows += len(chunk)
+
+    if writer is not None:
+        writer.close()
+    return rows
@@ -0,0 +1,38 @@
+import time
+
+
+class ClockBase:
+    """Источник времени для всех компонентов, зависящих от времени"""
+
+    def now(self):
+        """Текущее время в секундах"""
+        return 0.0
+
+    def advance(self, dt):
+        """Сдвиг времени на шаг симуляции (для реальных часов ничего не делает)"""
+        return self.now()
+
+
+class SimClock(ClockBase):
+    """
+    Модельное время: идет только через advance(dt).
+    Используется в UI, headless и replay режимах — ускоренный прогон
+    дает то же поведение трекера, что и прогон в реальном времени.
+    """
+
+    def __init__(self, start=0.0):
+        self.t = float(start)
+
+    def now(self):
+        return self.t
+
+    def advance(self, dt):
+        self.t += dt
+        return self.t
+
+
+class RealClock(ClockBase):
+    """Реальное (монотонное) время — для живой камеры и меток захвата кадра"""
+
+    def now(self):
+        return time.monotonic()
@@ -0,0 +1,90 @@
+import csv
+import json
+import os
+import time
+
+from .latency_monitor import RollingStat
+
+
+class StageProfiler:
+    """
+    Время выполнения стадий кадра (реальное время perf_counter, не модельное).
+    На каждую стадию — RollingStat по последним window замерам (предвыделенный
+    кольцевой буфер), из него p50/p95/p99.
+
+        t0 = profiler.start()
+        ...
+        profiler.stop("analyzer", t0)
+
+    Выключенный профайлер: start() отдает 0, stop() сразу выходит —
+    хук стоит пару вызовов функции.
+    С tracer (TraceRecorder) каждый замер еще и попадает в таймлайн как интервал,
+    даже если статистика выключена.
+    """
+
+    WINDOW = 512
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, enabled=False, window=WINDOW, tracer=None):
+        self.enabled = enabled
+        self.window = window
+        self.stats = {}  # стадия -> RollingStat (сек), в порядке первого замера
+        self.tracer = tracer
+        self._active = enabled or tracer is not None
+
+    def set_tracer(self, tracer):
+        self.tracer = tracer
+        self._active = self.enabled or tracer is not None
+
+    def start(self):
+        return time.perf_counter() if self._active else 0.0
+
+    def stop(self, stage, t0):
+        if not t0:
+            return
+        t1 = time.perf_counter()
+        if self.tracer is not None:
+            self.tracer.span(stage, t0, t1)
+        if not self.enabled:
+            return
+        stat = self.stats.get(stage)
+        if stat is None:
+            stat = self.stats[stage] = RollingStat(self.window)
+        stat.add(t1 - t0)
+
+    def reset(self):
+        self.stats = {}
+
+    def summary(self):
+        """Список по стадиям: count, mean/p50/p95/p99/max в миллисекундах"""
+        rows = []
+        for stage, stat in self.stats.items():
+            p50, p95, p99 = stat.percentile(list(self.PERCENTILES))
+            rows.append({
+                "stage": stage,
+                "count": stat.count,
+                "mean_ms": stat.mean() * 1000,
+                "p50_ms": p50 * 1000,
+                "p95_ms": p95 * 1000,
+                "p99_ms": p99 * 1000,
+                "max_ms": stat.max() * 1000,
+            })
+        return rows
+
+    def slowest(self, n, key="p95_ms"):
+        return sorted(self.summary(), key=lambda r: r[key], reverse=True)[:n]
+
+    def dump(self, path):
+        """Сводка в файл: *.csv — таблица, иначе JSON"""
+        rows = self.summary()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=["stage", "count", "mean_ms", "p50_ms",
+                                                       "p95_ms", "p99_ms", "max_ms"])
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(path, "w") as f:
+                json.dump({"window": self.window, "stages": rows}, f, indent=2)
+        return path
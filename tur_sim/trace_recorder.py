@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+import time
+
+
+class TraceRecorder:
+    """
+    Таймлайн кадров в формате Chrome trace-event (открывается в Perfetto / chrome://tracing).
+    Интервалы стадий приходят из StageProfiler (те же хуки), мгновенные события —
+    смена состояния автомата, выстрел, попадание/промах.
+    События лежат в кольцевом буфере фиксированного размера: трассировку можно
+    держать включенной часами и по запросу сохранить последние N секунд.
+    """
+
+    CAPACITY = 200_000  # событий (~ минута при 240 Гц физике со всеми стадиями)
+    PID = 1
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.events = [None] * capacity  # (ph, name, t, dur, tid, args); t, dur — сек perf_counter
+        self.idx = 0
+        self.count = 0
+        self.t_start = time.perf_counter()
+        self.threads = {}  # ident -> имя потока, для метаданных
+
+    def _push(self, event):
+        self.events[self.idx] = event
+        self.idx = (self.idx + 1) % self.capacity
+        self.count += 1
+
+    def _tid(self):
+        ident = threading.get_ident()
+        if ident not in self.threads:
+            self.threads[ident] = threading.current_thread().name
+        return ident
+
+    def span(self, name, t0, t1):
+        """Завершенный интервал стадии (ph "X"), t0/t1 — perf_counter()"""
+        self._push(("X", name, t0, t1 - t0, self._tid(), None))
+
+    def instant(self, name, args=None):
+        """Мгновенное событие (ph "i"): смена состояния, выстрел, попадание"""
+        self._push(("i", name, time.perf_counter(), 0.0, self._tid(), args))
+
+    def _ordered(self):
+        """События буфера от старых к новым"""
+        if self.count < self.capacity:
+            return self.events[:self.count]
+        return self.events[self.idx:] + self.events[:self.idx]
+
+    def to_chrome(self, last_sec=None):
+        events = self._ordered()
+        if last_sec is not None and events:
+            t_min = time.perf_counter() - last_sec
+            events = [e for e in events if e[2] + e[3] >= t_min]
+
+        out = [{"ph": "M", "name": "process_name", "pid": self.PID, "tid": 0,
+                "args": {"name": "tur_sim"}}]
+        for ident, name in self.threads.items():
+            out.append({"ph": "M", "name": "thread_name", "pid": self.PID, "tid": ident,
+                        "args": {"name": name}})
+
+        for ph, name, t, dur, tid, args in events:
+            e = {"ph": ph, "name": name, "cat": name.split(".")[0],
+                 "ts": (t - self.t_start) * 1e6, "pid": self.PID, "tid": tid}
+            if ph == "X":
+                e["dur"] = dur * 1e6
+            else:
+                e["s"] = "t"
+            if args:
+                e["args"] = args
+            out.append(e)
+        return {"traceEvents": out, "displayTimeUnit": "ms",
+                "otherData": {"dropped_events": max(self.count - self.capacity, 0)}}
+
+    def dump(self, path, last_sec=None):
+        """Сохранить буфер (или последние last_sec секунд) в JSON для Perfetto"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_chrome(last_sec), f)
+        return path
@@ -1,31 +1,40 @@
 import math
 
 import numpy as np
-import time
 
-from tur_sim.camera_virtual import CameraVirtual
+from tur_sim.ballistics_solver import BallisticsSolver
 from tur_sim.kalman_predictor import KalmanPredictor
+from tur_sim.sim_clock import RealClock
+
+
+def ema_alpha(dt, tau):
+    """Коэффициент EMA для шага dt по постоянной времени tau (в секундах)"""
+    if tau <= 0:
+        return 1.0
+    return 1.0 - math.exp(-dt / tau)
 
 
 class TrackedTarget:
-    def __init__(self, target_id, screen_x, screen_y, raw_dist, camera):
+    def __init__(self, target_id, screen_x, screen_y, raw_dist, camera, clock=None):
         self.id = target_id
         self.camera = camera
+        # Часы, по которым считаем dt (модельные в симуляции, реальные с живой камерой)
+        self.clock = clock if clock is not None else RealClock()
         self.position = camera.get_world_pos_from_screen(screen_x, screen_y, raw_dist)
         self.velocity = np.zeros(3)
 
-        self.last_update_time = time.time()
-
-        # Для фильтрации скорости (чтобы прицел не дергался)
-        self.alpha = 0.2  # Коэффициент сглаживания (EMA)
+        self.last_update_time = self.clock.now()
 
-        # Коэффициенты сглаживания (0.05 - 0.2)
-        # Чем МЕНЬШЕ число, тем плавнее движение, но больше задержка
-        self.pos_alpha = 0.5  # Сглаживание позиции
-        self.vel_alpha = 0.5  # Сглаживание скорости (самый шумный параметр)
+        # Постоянные времени сглаживания (EMA) в секундах.
+        # Коэффициент на шаге считается из реального dt, поэтому поведение
+        # фильтров не зависит от частоты кадров.
+        # Чем БОЛЬШЕ tau, тем плавнее движение, но больше задержка
+        self.pos_tau = 0.024  # Сглаживание позиции (~alpha 0.5 на 60 Гц)
+        self.vel_tau = 0.024  # Сглаживание скорости (самый шумный параметр)
+        self.ang_vel_tau = 0.16  # Сглаживание угловой скорости (~alpha 0.1 на 60 Гц)
 
         self.filtered_dist = raw_dist
-        self.dist_alpha = 0.1  # Жесткий фильтр для дистанции (0.05 - 0.15)
+        self.dist_tau = 0.16  # Жесткий фильтр для дистанции (~alpha 0.1 на 60 Гц)
 
         self.last_angles = None
         self.velocity_angles = np.zeros(2)  # [v_yaw, v_pitch] в рад/сек
@@ -34,14 +43,17 @@ class TrackedTarget:
         self.kalman = KalmanPredictor(self.position)
         self.predicted_screen_pos = (screen_x, screen_y) # кальман
         self.old_predicted_screen_pos = (screen_x, screen_y) # линейное предсказание
+        self.intercept_converged = False # сошелся ли решатель перехвата на этом кадре
+        self.aim_rates = (0.0, 0.0) # угловая скорость точки упреждения (рад/с)
         # -------------------------------
 
-    def update_with_screen_data(self, screen_x, screen_y, raw_dist, camera):
+    def update_with_screen_data(self, screen_x, screen_y, raw_dist, camera, timestamp=None):
         """
         Обновление через сырые данные с камеры.
         Сначала фильтруем дистанцию, потом считаем всё остальное.
+        timestamp - время захвата кадра (если None, берем текущее время часов)
         """
-        now = time.time()
+        now = self.clock.now() if timestamp is None else timestamp
         dt = now - self.last_update_time
 
         # 1. Получаем углы на цель прямо сейчас (из пикселей)
@@ -52,14 +64,16 @@ class TrackedTarget:
             inst_v_yaw = (current_yaw - self.last_angles[0]) / dt
             inst_v_pitch = (current_pitch - self.last_angles[1]) / dt
 
-            alpha_v = 0.1  # Фильтр для скорости
+            alpha_v = ema_alpha(dt, self.ang_vel_tau)  # Фильтр для скорости
             self.velocity_angles[0] = self.velocity_angles[0] * (1 - alpha_v) + inst_v_yaw * alpha_v
             self.velocity_angles[1] = self.velocity_angles[1] * (1 - alpha_v) + inst_v_pitch * alpha_v
 
         self.last_angles = (current_yaw, current_pitch)
 
         # 1. Фильтруем дистанцию (убираем скачки в пикселях)
-        self.filtered_dist = self.filtered_dist * (1 - self.dist_alpha) + raw_dist * self.dist_alpha
+        if dt > 0:
+            dist_alpha = ema_alpha(dt, self.dist_tau)
+            self.filtered_dist = self.filtered_dist * (1 - dist_alpha) + raw_dist * dist_alpha
 
         # 2. Получаем мировую позицию, используя УЖЕ ОТФИЛЬТРОВАННУЮ дистанцию
         stable_world_pos = camera.get_world_pos_from_screen(screen_x, screen_y, self.filtered_dist)
@@ -70,24 +84,27 @@ class TrackedTarget:
         # -------------------------------
 
         # 3. Вызываем обычный метод обновления позиции и скорости
-        self.update(stable_world_pos)
+        self.update(stable_world_pos, now)
 
-    def update(self, current_world_pos):
-        now = time.time()
+    def update(self, current_world_pos, timestamp=None):
+        now = self.clock.now() if timestamp is None else timestamp
         dt = now - self.last_update_time
 
         if dt <= 0.001: return
 
         new_pos = np.array(current_world_pos, dtype=float)
 
+        pos_alpha = ema_alpha(dt, self.pos_tau)
+        vel_alpha = ema_alpha(dt, self.vel_tau)
+
         # 1. Фильтруем позицию (убирает дрожание самой рамки)
-        self.position = self.position * (1 - self.pos_alpha) + new_pos * self.pos_alpha
+        self.position = self.position * (1 - pos_alpha) + new_pos * pos_alpha
 
         # 2. Вычисляем скорость по отфильтрованной позиции
         instant_velocity = (new_pos - self.position) / dt
 
         # 3. Фильтруем скорость (убирает дерганье прицела "на опережение")
-        self.velocity = self.velocity * (1 - self.vel_alpha) + instant_velocity * self.vel_alpha
+        self.velocity = self.velocity * (1 - vel_alpha) + instant_velocity * vel_alpha
 
         self.last_update_time = now
 
@@ -104,37 +121,61 @@ class TrackedTarget:
         # return r_pos
         return k_future
 
-    def get_fire_solution(self, shooter_pos, projectile_speed, g):
+    def get_fire_solution(self, shooter_pos, projectile_speed, g, firing_table=None, latency=0.0):
         """
         Главный метод: рассчитывает точку прицеливания с учетом
         упреждения и гравитации.
+        Время полета уточняется итеративно по состоянию Калмана
+        (позиция, скорость, ускорение) и параболической траектории пули.
+        latency — задержка от захвата кадра до выхода турели на угол (добавляется к горизонту)
         """
-        dist = np.linalg.norm(self.position - shooter_pos)
-        t_fly = dist / projectile_speed
-
-        # Точка упреждения (по вектору скорости)
-        lead_point = self.predict_position(t_fly)
-
-        # Баллистическая поправка (превышение над lead_point)
-        # h = (g * t^2) / 2
-        drop_correction = (g * (t_fly ** 2)) / 2
-
-        # Финальная точка прицеливания (поднимаем по оси Y)
-        # ВНИМАНИЕ: Если Y в мире растет вниз, здесь должен быть +
-        aim_point = lead_point.copy()
-        aim_point[1] -= drop_correction
-
+        t_fly, aim_point, _ = self._solve_intercept(shooter_pos, projectile_speed, g,
+                                                    firing_table, latency)
         return aim_point
 
-    def get_fire_angles(self, shooter_pos, projectile_speed, g):
+    def _solve_intercept(self, shooter_pos, projectile_speed, g, firing_table=None, latency=0.0):
+        """Решение перехвата для этой цели: (t_fly, aim_point, (yaw, pitch))"""
+        X = self.kalman.X
+        t_fly, yaw, pitch, converged, aim = BallisticsSolver.solve_intercept(
+            X[0:3], X[3:6], X[6:9], projectile_speed, g, shooter_pos,
+            table=firing_table, t_offset=latency
+        )
+        self.intercept_converged = bool(converged[0])
+
+        # Точка упреждения (для отрисовки прогноза)
+        self.predict_position(latency + t_fly[0])
+
+        # Угловая скорость точки упреждения (для feed-forward турели):
+        # скорость цели в момент встречи, спроецированная на углы
+        v = X[3:6] + X[6:9] * (latency + t_fly[0])
+        self.aim_rates = self._angle_rates(aim[0], v)
+
+        # Решатель возвращает точку относительно стрелка — возвращаем в мир
+        aim_point = aim[0] + np.asarray(shooter_pos, dtype=float)
+        return t_fly[0], aim_point, (yaw[0], pitch[0])
+
+    @staticmethod
+    def _angle_rates(rel, vel):
+        """d(yaw)/dt, d(pitch)/dt точки rel (относительно стрелка), движущейся со скоростью vel"""
+        x, y, z = rel
+        vx, vy, vz = vel
+        h2 = x * x + z * z
+        if h2 < 1e-9:
+            return 0.0, 0.0
+        h = math.sqrt(h2)
+        dh = (x * vx + z * vz) / h
+        yaw_rate = (z * vx - x * vz) / h2
+        pitch_rate = -(h * vy - y * dh) / (h2 + y * y)
+        return float(yaw_rate), float(pitch_rate)
+
+    def get_angle_rates(self):
+        """Угловая скорость последнего решения перехвата (рад/с): (yaw_rate, pitch_rate)"""
+        return self.aim_rates
+
+    def get_fire_angles(self, shooter_pos, projectile_speed, g, firing_table=None, latency=0.0):
         """погучение углов для турелт"""
-        aim_point = self.get_fire_solution(
-            shooter_pos, projectile_speed, g
+        _, _, (target_yaw, target_pitch) = self._solve_intercept(
+            shooter_pos, projectile_speed, g, firing_table, latency
         )
 
-        # Переводим мировую точку прицеливания в углы для турели
-        # (Используем atan2 для Yaw и Pitch)
-        target_yaw = math.atan2(aim_point[0], aim_point[2])
-        target_pitch = -math.atan2(aim_point[1], np.hypot(aim_point[0], aim_point[2]))
-
-        return target_yaw, target_pitch
\ No newline at end of file
+        return float(target_yaw), float(target_pitch)
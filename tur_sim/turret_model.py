@@ -4,7 +4,7 @@ import numpy as np
 
 from .camera_virtual import CameraVirtual
 from .physical_object import PhysicalObject
-from .motion_base import MotionLinear, MotionBallistic  # Предположим, пуля летит прямо
+from .motion_base import MotionLinear, MotionBallistic, MotionDrag  # Предположим, пуля летит прямо
 from .physical_world import PhysicalWorld
 
 class TurretModel:
@@ -24,7 +24,22 @@ class TurretModel:
         #поворот по точке
         self.max_turn_speed = math.radians(60)
 
+        # Режим слежения с упреждением по скорости (feed-forward):
+        # скорость привода = скорость цели + kp * ошибка, с ограничением скорости
+        # (max_turn_speed) и, если задано, ускорения (max_turn_accel)
+        self.use_feedforward = False
+        self.kp = 20.0  # 1/с
+        self.max_turn_accel = None  # рад/с^2, None — без ограничения
+
+        # Угловая скорость цели (упреждение) и текущая скорость приводов
+        self.target_yaw_rate = 0.0
+        self.target_pitch_rate = 0.0
+        self.yaw_rate = 0.0
+        self.pitch_rate = 0.0
+
         self.projectile_speed = 50.0  # м/с
+        # Модель полета с сопротивлением (ProjectileModel); None — только гравитация
+        self.projectile_model = None
 
         # признак, что мы уперлись в предел скорости турели
         self.limited_turn = False
@@ -39,12 +54,18 @@ class TurretModel:
         self.yaw = self.target_yaw
         self.pitch = self.target_pitch
 
-    def set_target_angles(self, yaw, pitch):
-        """Устанавливаем точку, куда турель должна начать плавно поворачиваться"""
+    def set_target_angles(self, yaw, pitch, yaw_rate=0.0, pitch_rate=0.0):
+        """
+        Устанавливаем точку, куда турель должна начать плавно поворачиваться.
+        yaw_rate, pitch_rate — угловая скорость цели (рад/с) для режима feed-forward
+        """
         self.target_yaw = self.norm_angle(yaw)
         # Ограничим наклон, чтобы пушка не делала "сальто" (от -90 до +90 град)
         self.target_pitch = max(math.radians(-89), min(math.radians(89), pitch))
 
+        self.target_yaw_rate = yaw_rate
+        self.target_pitch_rate = pitch_rate
+
         # print(f"set target angles {self.target_yaw:0.2f} {self.target_pitch:0.2f}")
 
     def norm_angle(self,angle):
@@ -67,21 +88,55 @@ class TurretModel:
         # actual_step = min(max_delta, abs(diff) * 0.5)
         return current + math.copysign(actual_step, diff)
 
+    def _track(self, diff, rate_ff, rate_prev, dt):
+        """Скорость привода по одной оси в режиме feed-forward"""
+        rate = rate_ff + self.kp * diff
+
+        if self.max_turn_accel:
+            # Не разгоняемся сильнее, чем успеем затормозить к цели
+            brake = math.sqrt(2 * self.max_turn_accel * abs(diff))
+            rate = max(rate_ff - brake, min(rate_ff + brake, rate))
+
+            dv = self.max_turn_accel * dt
+            if abs(rate - rate_prev) > dv:
+                rate = rate_prev + math.copysign(dv, rate - rate_prev)
+                self.limited_turn = True
+
+        if abs(rate) > self.max_turn_speed:
+            rate = math.copysign(self.max_turn_speed, rate)
+            self.limited_turn = True
+
+        return rate
+
     def update(self, dt):
 
 
         # Максимальный поворот за этот кадр
         step = self.max_turn_speed * dt
 
+        # Цель движется и между командами — сдвигаем ее по известной скорости
         self.set_target_angles(
-            self.target_yaw + self.joystich_val_x * step,
-            self.target_pitch + self.joystich_val_y * step
+            self.target_yaw + self.joystich_val_x * step + self.target_yaw_rate * dt,
+            self.target_pitch + self.joystich_val_y * step + self.target_pitch_rate * dt,
+            self.target_yaw_rate, self.target_pitch_rate
         )
 
         self.limited_turn = False
-        # Плавно двигаем углы
-        self.yaw = self._approach(self.yaw, self.target_yaw, step)
-        self.pitch = self._approach(self.pitch, self.target_pitch, step)
+        if self.use_feedforward and dt > 0:
+            d_yaw = self.norm_angle(self.target_yaw - self.yaw)
+            self.yaw_rate = self._track(d_yaw, self.target_yaw_rate, self.yaw_rate, dt)
+            self.pitch_rate = self._track(self.target_pitch - self.pitch,
+                                          self.target_pitch_rate, self.pitch_rate, dt)
+            self.yaw = self.norm_angle(self.yaw + self.yaw_rate * dt)
+            self.pitch += self.pitch_rate * dt
+        else:
+            # Плавно двигаем углы
+            prev_yaw, prev_pitch = self.yaw, self.pitch
+            self.yaw = self._approach(self.yaw, self.target_yaw, step)
+            self.pitch = self._approach(self.pitch, self.target_pitch, step)
+            if dt > 0:
+                self.yaw_rate = (self.yaw - prev_yaw) / dt
+                self.pitch_rate = (self.pitch - prev_pitch) / dt
 
         # Синхронизируем камеру с актуальными углами
         self.camera.yaw = self.yaw
@@ -113,13 +168,18 @@ class TurretModel:
         direction = np.array([dir_x, dir_y, dir_z])
         velocity = direction * self.projectile_speed
 
+        if self.projectile_model is not None:
+            behavior = MotionDrag(velocity=velocity, model=self.projectile_model)
+        else:
+            behavior = MotionBallistic(velocity=velocity)
+
         # Снаряд: маленький зеленый шарик
         projectile = PhysicalObject(
             pos= [0, 0, 0],  # Вылет из начала координат (где стоит пушка)
             radius= self.BULLET_RADIUS,
             color= (0, 255, 0),
             obj_type= "bullet",
-            behavior= MotionBallistic(velocity=velocity),
+            behavior= behavior,
             lifetime= 3.0  # Пуля исчезнет через 3 секунды сама
 
         )
@@ -1,3 +1,5 @@
+import time
+
 import pygame
 
 from .kalman_predictor import KalmanPredictor
@@ -7,6 +9,7 @@ from .widget_camera import WidgetCamera
 from .widget_slider import WidgetSlider
 from .widget_telemetry import WidgetTelemetry
 from .controller import Controller
+from .loop_scheduler import LoopScheduler
 
 # геометтрия кнопок
 BTN_W = 120
@@ -23,7 +26,16 @@ PAN_W = 300
 SLIDER_H = 25
 SLIDER_GAP = 30
 
-TELEM_H = 120
+TELEM_H = 170
+TELEM_PROFILE_H = (WidgetTelemetry.PROFILE_LINES + 1) * WidgetTelemetry.LINE_HEIGHT
+
+# Куда F9 сохраняет сводку профайлера (имя + метка времени, .csv и .json)
+PROFILE_DUMP_DIR = "data/profile"
+# Куда F10 сохраняет таймлайн (Chrome trace-event JSON для Perfetto)
+TRACE_DUMP_DIR = "data/trace"
+
+# Частота отрисовки (обычно частота дисплея); физика и камера — в LoopScheduler
+RENDER_FPS = 60
 
 class UIManager:
     def __init__(self, controller, width=WIN_W, height=WIN_H):
@@ -41,6 +53,7 @@ class UIManager:
             self.font = None
 
         self.clock = pygame.time.Clock()
+        self.scheduler = LoopScheduler(controller)
         self.running = True
         self.elements = []
 
@@ -78,12 +91,13 @@ class UIManager:
         pan_x = self.width - PAN_W - WIN_GAP
         pan_y = WIN_GAP
 
-        # Телеметрия справа
+        # Телеметрия справа (со строками профайлера, если он включен)
+        telem_h = TELEM_H + (TELEM_PROFILE_H if self.controller.profiler.enabled else 0)
         self.elements.append(WidgetTelemetry(
-            pan_x, pan_y, PAN_W, TELEM_H,
+            pan_x, pan_y, PAN_W, telem_h,
             self.controller))
 
-        pan_y += TELEM_H + WIN_GAP + SLIDER_GAP
+        pan_y += telem_h + WIN_GAP + SLIDER_GAP
 
         # --- ползунки ---
 
@@ -146,13 +160,16 @@ class UIManager:
     def run(self):
         while self.running:
             # Получаем время кадра в миллисекундах и переводим в секунды
-            # tick(60) гарантирует, что цикл не выполнится быстрее 60 раз в секунду
-            dt = self.clock.tick(60) / 1000.0
+            # tick(RENDER_FPS) гарантирует, что цикл не выполнится быстрее частоты отрисовки
+            dt = self.clock.tick(RENDER_FPS) / 1000.0
 
+            t_frame = self.controller.profiler.start()
             self.handle_events()
             self.update(dt)
             self.draw()
+            self.controller.profiler.stop("frame", t_frame)
 
+        self.controller.close()
         pygame.quit()
 
     def handle_events(self):
@@ -163,6 +180,10 @@ class UIManager:
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     self.controller.fire()
+                elif event.key == pygame.K_F9:
+                    self.dump_profile()
+                elif event.key == pygame.K_F10:
+                    self.dump_trace()
 
             for el in self.elements:
                 el.handle_event(event)
@@ -209,12 +230,43 @@ class UIManager:
         if dx != 0 or dy != 0:
             self.controller.turret.turn(dx,dy)
 
-        self.controller.update(dt)
+        # Физика подшагами с фиксированным dt, камера и управление — по своим кадрам
+        self.scheduler.advance(dt)
 
 
 
     def draw(self):
+        prof = self.controller.profiler
+        t_draw = prof.start()
+
         self.screen.fill((10, 10, 10))  # Темный фон
         for el in self.elements:
+            t0 = prof.start()
             el.draw(self.screen)
-        pygame.display.flip()
\ No newline at end of file
+            prof.stop(el.profile_stage, t0)
+
+        t0 = prof.start()
+        pygame.display.flip()
+        prof.stop("draw.flip", t0)
+        prof.stop("draw", t_draw)
+
+    def dump_profile(self):
+        """Сводка профайлера стадий в CSV и JSON"""
+        prof = self.controller.profiler
+        if not prof.enabled:
+            print("Профайлер выключен (Controller.PROFILING)")
+            return
+        base = f"{PROFILE_DUMP_DIR}/profile_{time.strftime('%Y%m%d_%H%M%S')}"
+        prof.dump(base + ".csv")
+        prof.dump(base + ".json")
+        print(f"Профиль стадий сохранен: {base}.csv/.json")
+
+    def dump_trace(self):
+        """Последние секунды таймлайна в Chrome trace-event JSON"""
+        tracer = self.controller.tracer
+        if tracer is None:
+            print("Трассировка выключена (Controller.TRACING)")
+            return
+        path = f"{TRACE_DUMP_DIR}/trace_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        tracer.dump(path, self.controller.TRACE_DUMP_SEC)
+        print(f"Таймлайн сохранен: {path} (открыть в ui.perfetto.dev)")
\ No newline at end of file
@@ -5,6 +5,8 @@ import pygame
 class WidgetBase:
     def __init__(self, x, y, width, height):
         self.rect = pygame.Rect(x, y, width, height)
+        # Имя стадии для StageProfiler (время draw по типам виджетов)
+        self.profile_stage = "draw." + type(self).__name__
 
     def draw(self, screen):
         pass
@@ -1,6 +1,5 @@
 import numpy as np
 import pygame
-import cv2
 
 from .controller import Controller
 from .widget_base import WidgetBase
@@ -21,8 +20,8 @@ class WidgetCamera(WidgetBase):
         # 1. Получаем кадр от камеры
         frame = self.camera.get_frame()
 
-        # 2. Конвертируем BGR (OpenCV) в RGB (Pygame)
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # 2. Конвертируем BGR (OpenCV) в RGB (Pygame) — просто разворот каналов
+        frame_rgb = frame[:, :, ::-1]
 
         # 3. Создаем Surface из массива (нужно транспонировать оси для Pygame)
         # Pygame ожидает (width, height), а numpy выдает (height, width)
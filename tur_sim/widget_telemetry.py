@@ -1,4 +1,5 @@
 import math
+import time
 
 import pygame
 
@@ -9,12 +10,16 @@ class WidgetTelemetry(WidgetBase):
 
     FONT_SIZE = 20
     LINE_HEIGHT = 25
+    PROFILE_LINES = 4  # самых медленных стадий (по p95) при включенном профайлере
+    PROFILE_REFRESH = 0.5  # сек, как часто пересчитывать процентили
 
     """Виджет для вывода текстовых данных"""
     def __init__(self, x, y, width, height, controller):
         super().__init__(x, y, width, height)
         self.controller : Controller = controller
         self.font = pygame.font.SysFont('Arial', self.FONT_SIZE)
+        self.profile_rows = []
+        self.profile_time = 0.0
 
     def draw(self, screen):
         pygame.draw.rect(screen, (30, 30, 30), self.rect) # Фон
@@ -36,6 +41,30 @@ class WidgetTelemetry(WidgetBase):
         self.out_line(screen,
             f"Dist to target: {self.controller.get_locked_distance():0.1f}", 3)
 
+        ttfs = self.controller.last_time_to_first_shot
+        self.out_line(screen,
+            f"До 1-го выстрела: {ttfs if ttfs is not None else 0:.2f} c"
+            f" (ср. {self.controller.get_mean_time_to_first_shot():.2f})", 4)
+
+        lat = self.controller.latency
+        self.out_line(screen,
+            f"Задержка: {lat.total_latency() * 1000:.0f} мс"
+            f" (p95 {lat.total.percentile(95) * 1000:.0f},"
+            f" обработка {lat.pipeline_latency() * 1000:.1f})", 5)
+
+        prof = self.controller.profiler
+        if prof.enabled:
+            now = time.monotonic()
+            if now - self.profile_time > self.PROFILE_REFRESH:
+                self.profile_rows = prof.slowest(self.PROFILE_LINES)
+                self.profile_time = now
+
+            self.out_line(screen, "Стадии, мс p50 / p95 / p99:", 6)
+            for i, r in enumerate(self.profile_rows):
+                self.out_line(screen,
+                    f"  {r['stage']}: {r['p50_ms']:.2f} / {r['p95_ms']:.2f} / {r['p99_ms']:.2f}",
+                    7 + i)
+
 
 
 